@@ -0,0 +1,115 @@
+"""
+SQL statement count and latency of the dashboard read endpoints by shelf size.
+
+Seeds a throwaway SQLite database with N books x 3 libraries of cached
+availability, calls the books list, the first books page, the "available
+now" count, the dashboard stats and GET /api/availability/{id} through
+the app, and counts the statements each one issues. Exits non-zero if the count grows with shelf
+size (an N+1 regression).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_books_queries [--sizes 10 100 500]
+"""
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from models import Base, User, Library, Book, AvailabilityCache, get_db
+
+LIBRARIES = 3
+
+
+def seed(session, books: int):
+    session.add(User(id=1, email="default@local"))
+    libraries = [
+        Library(user_id=1, name=f"Library {i}", base_url=f"https://lib{i}.overdrive.com")
+        for i in range(LIBRARIES)
+    ]
+    session.add_all(libraries)
+    session.flush()
+
+    now = datetime.utcnow()
+    for i in range(books):
+        book = Book(user_id=1, title=f"Book {i}", author=f"Author {i}", date_added=now - timedelta(days=i))
+        session.add(book)
+        session.flush()
+        session.add_all(
+            AvailabilityCache(
+                book_id=book.id, library_id=library.id, status="hold",
+                checked_at=now, expires_at=now + timedelta(hours=4)
+            )
+            for library in libraries
+        )
+    session.commit()
+
+
+def measure(books: int) -> dict:
+    """Statement count and latency per endpoint for a shelf of `books`."""
+    with tempfile.NamedTemporaryFile(suffix=".db") as db_file:
+        seed_engine = create_engine(f"sqlite:///{db_file.name}")
+        Base.metadata.create_all(bind=seed_engine)
+        with sessionmaker(bind=seed_engine, autoflush=False)() as session:
+            seed(session, books)
+        seed_engine.dispose()
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_file.name}")
+        Session = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        async def override_get_db():
+            async with Session() as db:
+                yield db
+
+        async def run() -> dict:
+            results = {}
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name, path in [
+                    ("books", "/api/goodreads/books"),
+                    ("page", "/api/goodreads/books/page?limit=50"),
+                    ("count", "/api/goodreads/books/count?status=available"),
+                    ("stats", "/api/availability/stats"),
+                    ("cached", "/api/availability/1"),
+                ]:
+                    statements.clear()
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    response.raise_for_status()
+                    results[name] = (len(statements), elapsed_ms)
+            await engine.dispose()
+            return results
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            return asyncio.run(run())
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    counts = {}
+    for size in args.sizes:
+        results = measure(size)
+        for name, (count, elapsed_ms) in results.items():
+            counts.setdefault(name, set()).add(count)
+            print(f"{name:<7} {size:>5} books: {count:>3} statements, {elapsed_ms:8.1f} ms")
+
+    growing = [name for name, seen in counts.items() if len(seen) > 1]
+    if growing:
+        print(f"Statement count grows with shelf size: {', '.join(growing)}")
+        sys.exit(1)
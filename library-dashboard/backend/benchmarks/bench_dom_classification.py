@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: single-pass DOM classification vs per-selector probing.
+
+Loads each saved page in benchmarks/fixtures/overdrive/ into a pooled
+Chromium page and times
+  - legacy: one locator().count() round trip per selector plus page.content()
+  - single-pass: collect_page_features() + classify_page_features()
+and reports where they disagree (legacy probing takes the first hit on the
+page, the single pass ranks every title against the searched one).
+
+Usage (from the backend directory, needs `playwright install chromium`):
+    python -m benchmarks.bench_dom_classification [--iterations 20]
+"""
+from pathlib import Path
+from typing import Optional
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.replay_fixtures import fixture_name
+from services.browser_pool import BrowserPool
+from services.overdrive_scraper import (
+    AVAILABLE_SELECTORS, HOLD_SELECTORS, AVAILABILITY_KEYWORDS, TITLE_CARD_SELECTOR,
+    NO_RESULTS_INDICATORS, collect_page_features, classify_page_features
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "overdrive"
+
+
+async def legacy_status(page, title: str) -> str:
+    """Sequential probing as _detect_availability used to do it."""
+    for selector in AVAILABLE_SELECTORS:
+        if await page.locator(selector).count():
+            return "available"
+    for selector in HOLD_SELECTORS:
+        if await page.locator(selector).count():
+            return "hold"
+    page_text = (await page.content()).lower()
+    for status, keywords in AVAILABILITY_KEYWORDS.items():
+        if any(k in page_text for k in keywords):
+            return status.value
+    if await page.locator(TITLE_CARD_SELECTOR).count():
+        return "unknown"
+    return "not_found"
+
+
+async def single_pass_status(page, title: str, media_id: Optional[str] = None) -> str:
+    features = await collect_page_features(page)
+    return classify_page_features(features, "fixture://", title, media_id=media_id).status.value
+
+
+async def time_it(fn, page, title: str, iterations: int, **kwargs):
+    timings = []
+    status = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        status = await fn(page, title, **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return status, statistics.median(timings)
+
+
+async def main(iterations: int):
+    pool = BrowserPool(max_concurrency=1)
+    try:
+        async with pool.page(java_script_enabled=False) as page:
+            print(f"{'fixture':<45} {'legacy':>10} {'single':>10}  status")
+            for path in sorted(FIXTURES_DIR.glob("*.html")):
+                await page.set_content(path.read_text(encoding="utf-8"))
+                _, title, media_id = fixture_name(path)
+                legacy, legacy_ms = await time_it(legacy_status, page, title, iterations)
+                single, single_ms = await time_it(single_pass_status, page, title, iterations, media_id=media_id)
+                agree = "" if legacy == single else f"  MISMATCH (legacy={legacy})"
+                print(f"{path.name:<45} {legacy_ms:8.2f}ms {single_ms:8.2f}ms  {single}{agree}")
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,199 @@
+"""
+Event-loop responsiveness under database load: sync Session vs AsyncSession.
+
+Seeds a throwaway on-disk database with N books x 3 libraries of cached
+availability. For --seconds, --concurrency request coroutines repeatedly
+run the dashboard stats aggregate, while one background thread holds
+write transactions open the way a Goodreads sync or the result writer of
+a worker in another process does. Meanwhile a probe coroutine sleeps 5 ms
+at a time and records how late it wakes up - how long any other request
+on the loop (a /health call, an SSE keep-alive, a browser check's next
+step) is kept waiting.
+
+Compares
+  - sync:  a sync Session used inside the coroutines, as the routers did
+           before - every statement runs on the event loop
+  - async: create_sqlite_engine() and an AsyncSession, as the routers use
+           now - the driver runs statements off the loop
+and reports aggregate throughput and the probe's lag. (Per-request times
+of the sync mode would hide its queueing: a request only starts once the
+loop is free, which is what the lag measures.)
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_event_loop_latency [--books 5000] [--concurrency 16] [--seconds 5]
+"""
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from models import Base, User, Library, Book, AvailabilityCache
+from models.database import apply_sqlite_pragmas, create_sqlite_engine, DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+LIBRARIES = 3
+PROBE_MS = 5
+WRITE_BATCH = 300
+WRITE_HOLD_SECONDS = 0.05
+
+
+def create_sync_engine(url: str):
+    """Sync engine with the same pool and pragmas as the app's SQLite engine."""
+    sync_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+    event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    return sync_engine
+
+
+def seed(Session, books: int):
+    now = datetime.utcnow()
+    with Session() as session:
+        session.add(User(id=1, email="default@local"))
+        session.add_all(
+            Library(id=i + 1, user_id=1, name=f"Library {i}", base_url=f"https://lib{i}.overdrive.com")
+            for i in range(LIBRARIES)
+        )
+        session.add_all(
+            Book(id=i + 1, user_id=1, title=f"Book {i}", date_added=now - timedelta(hours=i))
+            for i in range(books)
+        )
+        session.add_all(
+            AvailabilityCache(
+                book_id=i + 1, library_id=library + 1, status="hold",
+                checked_at=now, expires_at=now + timedelta(hours=4)
+            )
+            for i in range(books)
+            for library in range(LIBRARIES)
+        )
+        session.commit()
+
+
+def stats_statement():
+    """The shape of the dashboard stats aggregate: every cache row of the shelf, grouped."""
+    return (
+        select(
+            AvailabilityCache.library_id,
+            AvailabilityCache.status,
+            func.count(AvailabilityCache.id),
+            func.max(AvailabilityCache.checked_at),
+        )
+        .join(Book, Book.id == AvailabilityCache.book_id)
+        .where(Book.user_id == 1)
+        .group_by(AvailabilityCache.library_id, AvailabilityCache.status)
+    )
+
+
+def hold_writes(Session, books: int, stop: threading.Event):
+    """Rewrite a slice of the shelf per transaction, keeping each open for a moment."""
+    round_number = 0
+    while not stop.is_set():
+        start_id = (round_number * WRITE_BATCH) % books + 1
+        with Session() as session:
+            session.execute(
+                update(AvailabilityCache)
+                .where(AvailabilityCache.book_id.between(start_id, start_id + WRITE_BATCH - 1))
+                .values(checked_at=datetime.utcnow())
+            )
+            time.sleep(WRITE_HOLD_SECONDS)
+            session.commit()
+        round_number += 1
+        time.sleep(WRITE_HOLD_SECONDS)
+
+
+def measure(mode: str, books: int, concurrency: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        sync_engine = create_sync_engine(url)
+        Base.metadata.create_all(bind=sync_engine)
+        SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+        seed(SyncSession, books)
+
+        async def run() -> dict:
+            engine = create_sqlite_engine(url)
+            AsyncSession = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            stop = asyncio.Event()
+            requests = [0]
+            lag_ms = []
+
+            async def sync_request():
+                with SyncSession() as session:
+                    session.execute(stats_statement()).all()
+
+            async def async_request():
+                async with AsyncSession() as session:
+                    (await session.execute(stats_statement())).all()
+
+            request = sync_request if mode == "sync" else async_request
+
+            async def client():
+                while not stop.is_set():
+                    await request()
+                    requests[0] += 1
+                    # Let other coroutines run, as a real request's network I/O would
+                    await asyncio.sleep(0)
+
+            async def probe():
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    await asyncio.sleep(PROBE_MS / 1000)
+                    lag_ms.append((time.perf_counter() - start) * 1000 - PROBE_MS)
+
+            writer_stop = threading.Event()
+            writer = threading.Thread(target=hold_writes, args=(SyncSession, books, writer_stop))
+            writer.start()
+            tasks = [asyncio.create_task(client()) for _ in range(concurrency)]
+            tasks.append(asyncio.create_task(probe()))
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.gather(*tasks)
+                writer_stop.set()
+                writer.join()
+                await engine.dispose()
+            return requests[0], lag_ms
+
+        requests, lag_ms = asyncio.run(run())
+        sync_engine.dispose()
+
+    lag_ms.sort()
+    return {
+        "requests": requests,
+        "probes": len(lag_ms),
+        "p50": statistics.median(lag_ms) if lag_ms else 0.0,
+        "p99": lag_ms[int(len(lag_ms) * 0.99)] if lag_ms else 0.0,
+        "max": lag_ms[-1] if lag_ms else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{args.books} books, {args.concurrency} concurrent requests + 1 writer thread, "
+        f"{args.seconds:g} s each; loop lag = how late a {PROBE_MS} ms sleep wakes up"
+    )
+    for mode in ("sync", "async"):
+        r = measure(mode, args.books, args.concurrency, args.seconds)
+        print(
+            f"{mode:<6} {r['requests'] / args.seconds:7.1f} req/s  "
+            f"loop lag p50 {r['p50']:7.1f} ms  p99 {r['p99']:7.1f} ms  max {r['max']:7.1f} ms  "
+            f"({r['probes']} probes)"
+        )
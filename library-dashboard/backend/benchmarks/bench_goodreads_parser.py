@@ -0,0 +1,141 @@
+"""
+Goodreads RSS parsing: feedparser vs the streaming parser.
+
+Builds a synthetic Goodreads-shaped feed (5,000 items by default, each
+with the usual CDATA description and image fields) and reports, for
+  - feedparser: parse_goodreads_feed() over the whole document
+  - streaming:  iter_goodreads_feed() over 64 KB chunks, as fetched
+the median parse time and the peak traced memory, and checks that both
+produce the same books.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_goodreads_parser [--items 5000] [--iterations 3]
+"""
+from datetime import datetime, timedelta
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+
+from services.goodreads_parser import parse_goodreads_feed, iter_goodreads_feed
+
+CHUNK_SIZE = 64 * 1024
+
+ITEM_TEMPLATE = """
+<item>
+  <guid><![CDATA[https://www.goodreads.com/review/show/{review_id}?utm_medium=api&utm_source=rss]]></guid>
+  <pubDate><![CDATA[{date}]]></pubDate>
+  <title>{title}</title>
+  <link><![CDATA[https://www.goodreads.com/review/show/{review_id}?utm_medium=api&utm_source=rss]]></link>
+  <book_id>{book_id}</book_id>
+  <book_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/{book_id}._SY75_.jpg]]></book_image_url>
+  <book_small_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/{book_id}._SY75_.jpg]]></book_small_image_url>
+  <book_medium_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/{book_id}._SX98_.jpg]]></book_medium_image_url>
+  <book_large_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/{book_id}.jpg]]></book_large_image_url>
+  <book_description><![CDATA[{blurb}]]></book_description>
+  <book id="{book_id}"><num_pages>{pages}</num_pages></book>
+  <author_name>{author}</author_name>
+  <isbn>{isbn10}</isbn>
+  <user_name>Reader</user_name>
+  <user_rating>0</user_rating>
+  <user_read_at></user_read_at>
+  <user_date_added><![CDATA[{date}]]></user_date_added>
+  <user_date_created><![CDATA[{date}]]></user_date_created>
+  <user_shelves>to-read</user_shelves>
+  <user_review></user_review>
+  <average_rating>4.12</average_rating>
+  <book_published>2019</book_published>
+  <description>
+    <![CDATA[
+      <a href="https://www.goodreads.com/book/show/{book_id}"><img alt="{title}" src="https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/{book_id}._SY75_.jpg" /></a><br/>
+      author: {author}<br/>
+      name: Reader<br/>
+      average rating: 4.12<br/>
+      book published: 2019<br/>
+      rating: 0<br/>
+      read at: <br/>
+      date added: {short_date}<br/>
+      shelves: to-read<br/>
+      review: <br/><br/>
+      isbn13: {isbn13}
+    ]]>
+  </description>
+</item>"""
+
+BLURB = (
+    "A sweeping story of ambition and consequence across three generations, "
+    "told with warmth, wit and an eye for the small details of ordinary lives. "
+) * 6
+
+
+def synthetic_feed(items: int) -> bytes:
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0">\n<channel>\n'
+             '<title>Reader\'s bookshelf: to-read</title>\n'
+             '<link><![CDATA[https://www.goodreads.com/review/list_rss/1?shelf=to-read]]></link>\n']
+    for i in range(items):
+        added = start - timedelta(hours=i)
+        parts.append(ITEM_TEMPLATE.format(
+            review_id=5000000000 + i,
+            book_id=40000000 + i,
+            title=f"The Book of Things, Volume {i} (Series of Things, #{i % 7 + 1})",
+            author=f"Author Number{i % 250}",
+            isbn10=f"{1000000000 + i}",
+            isbn13=f"978{1000000000 + i}",
+            pages=200 + i % 400,
+            date=added.strftime('%a, %d %b %Y %H:%M:%S -0800'),
+            short_date=added.strftime('%Y/%m/%d'),
+            blurb=BLURB,
+        ))
+    parts.append('\n</channel>\n</rss>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def chunked(data: bytes):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+
+def run_feedparser(data: bytes):
+    return parse_goodreads_feed(data)
+
+
+def run_streaming(data: bytes):
+    return list(iter_goodreads_feed(chunked(data)))
+
+
+def measure(fn, data: bytes, iterations: int):
+    timings = []
+    books = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        books = fn(data)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return books, statistics.median(timings), peak / (1024 * 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    data = synthetic_feed(args.items)
+    print(f"feed: {args.items} items, {len(data) / (1024 * 1024):.1f} MB")
+
+    results = {}
+    for name, fn in [("feedparser", run_feedparser), ("streaming", run_streaming)]:
+        books, elapsed_ms, peak_mb = measure(fn, data, args.iterations)
+        results[name] = books
+        print(f"{name:<11} {elapsed_ms:9.1f} ms  peak {peak_mb:7.1f} MB  {len(books)} books")
+
+    if results["feedparser"] != results["streaming"]:
+        mismatches = sum(a != b for a, b in zip(results["feedparser"], results["streaming"]))
+        print(f"Parsers disagree on {mismatches} books")
+        sys.exit(1)
@@ -0,0 +1,92 @@
+"""
+Accuracy and throughput of the title matcher on a labelled corpus.
+
+benchmarks/fixtures/matching_corpus.json holds (wanted book, candidate
+title, same book?) pairs. Each pair is scored by
+  - legacy: the desktop prototype's rule (whole title contained in the
+    candidate, or any title word longer than 3 characters present)
+  - matcher: services.title_matcher.similarity >= MIN_MATCH_SCORE
+and throughput is measured by scoring every candidate against every
+wanted key, with wanted keys precomputed as they are at sync time.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_matcher [--rounds 200]
+"""
+from pathlib import Path
+import argparse
+import json
+import time
+
+from services.title_cards import MIN_MATCH_SCORE
+from services.title_matcher import (
+    match_key, key_from_normalized, normalize_title, normalize_author, similarity
+)
+
+CORPUS = Path(__file__).parent / "fixtures" / "matching_corpus.json"
+
+
+def legacy_match(title: str, candidate_title: str) -> bool:
+    title_lower = title.lower()
+    element_text = candidate_title.lower()
+    return title_lower in element_text or any(
+        word in element_text for word in title_lower.split() if len(word) > 3
+    )
+
+
+def matcher_match(row: dict) -> bool:
+    wanted = match_key(row["title"], row["author"])
+    candidate = match_key(row["candidate_title"], row["candidate_author"])
+    return similarity(wanted, candidate) >= MIN_MATCH_SCORE
+
+
+def report(name: str, predictions: list, labels: list):
+    tp = sum(p and l for p, l in zip(predictions, labels))
+    fp = sum(p and not l for p, l in zip(predictions, labels))
+    fn = sum(not p and l for p, l in zip(predictions, labels))
+    accuracy = sum(p == l for p, l in zip(predictions, labels)) / len(labels)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{name:<8} accuracy {accuracy:6.1%}  precision {precision:6.1%}  recall {recall:6.1%}")
+
+
+def throughput(rows: list, rounds: int):
+    wanted_keys = [match_key(r["title"], r["author"]) for r in rows]
+    candidates = [(r["candidate_title"], r["candidate_author"]) for r in rows]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        # Candidate keys are built per page, so include that cost (bypassing the key cache)
+        candidate_keys = [
+            key_from_normalized.__wrapped__(normalize_title(t), normalize_author(a))
+            for t, a in candidates
+        ]
+        for wanted in wanted_keys:
+            for candidate in candidate_keys:
+                similarity(wanted, candidate)
+    elapsed = time.perf_counter() - start
+    pairs = rounds * len(wanted_keys) * len(candidates)
+    print(f"matcher  {pairs / elapsed:,.0f} pairs/s ({pairs:,} pairs in {elapsed:.2f}s)")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for r in rows:
+            for t, _ in candidates:
+                legacy_match(r["title"], t)
+    elapsed = time.perf_counter() - start
+    print(f"legacy   {pairs / elapsed:,.0f} pairs/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = json.loads(CORPUS.read_text(encoding="utf-8"))
+    labels = [r["match"] for r in rows]
+    print(f"{len(rows)} labelled pairs, threshold {MIN_MATCH_SCORE}")
+    report("legacy", [legacy_match(r["title"], r["candidate_title"]) for r in rows], labels)
+    report("matcher", [matcher_match(r) for r in rows], labels)
+    for r in rows:
+        if matcher_match(r) != r["match"]:
+            print(f"  miss: {r['title']!r} vs {r['candidate_title']!r} (expected {r['match']})")
+    throughput(rows, args.rounds)
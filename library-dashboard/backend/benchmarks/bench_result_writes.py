@@ -0,0 +1,133 @@
+"""
+Availability result writes: a commit per check vs the write-behind buffer.
+
+Seeds a throwaway SQLite database (default journal mode, on disk) with N
+books x 3 libraries, then writes one result per book x library from
+--concurrency concurrent "checks" that each finish after a short random
+delay, as the check worker's do. Reports for
+  - per-check: one upsert and one commit per result, as before
+  - batched:   ResultWriter.add(), flushing every --batch results or --flush-ms
+the wall time, the number of commits, and the writer's flush batch size
+and latency, and checks that both leave the same rows behind.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_result_writes [--books 500] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, Library, Book, AvailabilityCache
+from services.availability_cache import ResultWriter, availability_values, upsert_availability_results
+from services.availability_result import AvailabilityResult, AvailabilityStatus
+
+LIBRARIES = 3
+STATUSES = [AvailabilityStatus.AVAILABLE, AvailabilityStatus.HOLD, AvailabilityStatus.NOT_FOUND]
+
+
+def seed(Session, books: int):
+    with Session() as session:
+        session.add(User(id=1, email="default@local"))
+        session.add_all(
+            Library(id=i + 1, user_id=1, name=f"Library {i}", base_url=f"https://lib{i}.overdrive.com")
+            for i in range(LIBRARIES)
+        )
+        session.add_all(Book(id=i + 1, user_id=1, title=f"Book {i}") for i in range(books))
+        session.commit()
+
+
+def checks(books: int):
+    rng = random.Random(42)
+    return [
+        (book_id, library_id, AvailabilityResult(status=rng.choice(STATUSES), search_url=f"https://lib/{book_id}"))
+        for book_id in range(1, books + 1)
+        for library_id in range(1, LIBRARIES + 1)
+    ]
+
+
+async def run_checks(items, concurrency: int, write):
+    """Run `write` for every item from `concurrency` workers, after a simulated check delay."""
+    queue = list(reversed(items))
+    rng = random.Random(7)
+
+    async def worker():
+        while queue:
+            book_id, library_id, result = queue.pop()
+            await asyncio.sleep(rng.random() * 0.002)
+            await write(book_id, library_id, result)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def measure(mode: str, books: int, concurrency: int, batch: int, flush_ms: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=sync_engine)
+        SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+        seed(SyncSession, books)
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Session = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        commits = []
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+
+        async def run():
+            writer = ResultWriter(batch_size=batch, flush_ms=flush_ms, session_factory=Session)
+
+            async def per_check(book_id, library_id, result):
+                async with Session() as session:
+                    await upsert_availability_results(session, [availability_values(book_id, library_id, result)])
+                    await session.commit()
+
+            async def batched(book_id, library_id, result):
+                writer.add(book_id, library_id, result)
+
+            await run_checks(checks(books), concurrency, per_check if mode == "per-check" else batched)
+            await writer.flush()
+            await engine.dispose()
+            return writer.stats
+
+        start = time.perf_counter()
+        stats = asyncio.run(run())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with SyncSession() as session:
+            rows = session.execute(
+                select(AvailabilityCache.book_id, AvailabilityCache.library_id, AvailabilityCache.status)
+                .order_by(AvailabilityCache.book_id, AvailabilityCache.library_id)
+            ).all()
+        sync_engine.dispose()
+        return elapsed_ms, len(commits), stats, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--flush-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.books * LIBRARIES} results, {args.concurrency} concurrent checks")
+    rows = {}
+    for mode in ("per-check", "batched"):
+        elapsed_ms, commits, stats, rows[mode] = measure(
+            mode, args.books, args.concurrency, args.batch, args.flush_ms
+        )
+        line = f"{mode:<10} {elapsed_ms:9.1f} ms  {commits:5} commits"
+        if stats.flushes:
+            line += f"  ({stats.summary()})"
+        print(line)
+
+    if rows["per-check"] != rows["batched"]:
+        print("Modes left different rows behind")
+        sys.exit(1)
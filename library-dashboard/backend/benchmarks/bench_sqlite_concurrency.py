@@ -0,0 +1,182 @@
+"""
+SQLite under concurrent reads and a long-running writer.
+
+Seeds a throwaway on-disk database with N books x 3 libraries of cached
+availability. For --seconds, --readers threads repeatedly load a
+dashboard page (50 books with their availability) while one writer
+thread rewrites a few hundred books per transaction and holds each
+transaction open for a moment, the way a Goodreads sync does.
+
+Compares
+  - static: one shared connection (StaticPool), default pragmas - the old setup
+  - tuned:  the app's SQLite settings - pooled connections, and apply_sqlite_pragmas()
+            for WAL, synchronous=NORMAL, mmap, cache_size and busy_timeout
+and reports read throughput and latency percentiles, write commits, and
+errors (a shared connection can't run two threads' statements at once).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sqlite_concurrency [--books 2000] [--readers 8] [--seconds 5]
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from models import Base, User, Library, Book, AvailabilityCache
+from models.database import apply_sqlite_pragmas, DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+LIBRARIES = 3
+PAGE_SIZE = 50
+WRITE_BATCH = 300
+WRITE_HOLD_SECONDS = 0.05
+
+
+def seed(Session, books: int):
+    now = datetime.utcnow()
+    with Session() as session:
+        session.add(User(id=1, email="default@local"))
+        session.add_all(
+            Library(id=i + 1, user_id=1, name=f"Library {i}", base_url=f"https://lib{i}.overdrive.com")
+            for i in range(LIBRARIES)
+        )
+        session.add_all(
+            Book(id=i + 1, user_id=1, title=f"Book {i}", author=f"Author {i}", date_added=now - timedelta(hours=i))
+            for i in range(books)
+        )
+        session.add_all(
+            AvailabilityCache(
+                book_id=i + 1, library_id=library + 1, status="hold",
+                checked_at=now, expires_at=now + timedelta(hours=4)
+            )
+            for i in range(books)
+            for library in range(LIBRARIES)
+        )
+        session.commit()
+
+
+def read_page(Session, offset: int):
+    with Session() as session:
+        books = session.scalars(
+            select(Book)
+            .options(joinedload(Book.availability_cache))
+            .where(Book.user_id == 1)
+            .order_by(Book.date_added.desc(), Book.id)
+            .offset(offset)
+            .limit(PAGE_SIZE)
+        ).unique().all()
+        return sum(len(book.availability_cache) for book in books)
+
+
+def write_batch(Session, books: int, round_number: int):
+    start_id = (round_number * WRITE_BATCH) % books + 1
+    with Session() as session:
+        session.execute(
+            update(Book)
+            .where(Book.id.between(start_id, start_id + WRITE_BATCH - 1))
+            .values(title=Book.title + "", updated_at=datetime.utcnow())
+        )
+        session.execute(
+            update(AvailabilityCache)
+            .where(AvailabilityCache.book_id.between(start_id, start_id + WRITE_BATCH - 1))
+            .values(checked_at=datetime.utcnow())
+        )
+        # A sync keeps its transaction open while it works through the feed
+        time.sleep(WRITE_HOLD_SECONDS)
+        session.commit()
+
+
+def measure(profile: str, books: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        if profile == "static":
+            engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        else:
+            # The app's engine is async; reader threads need a sync one with the same settings
+            engine = create_engine(
+                url,
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW
+            )
+            event.listen(engine, "connect", apply_sqlite_pragmas)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        seed(Session, books)
+
+        stop = threading.Event()
+        read_ms = []
+        writes = [0]
+        errors = []
+        lock = threading.Lock()
+
+        def reader(index: int):
+            offset = index * PAGE_SIZE
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    read_page(Session, offset % books)
+                except Exception as e:
+                    with lock:
+                        errors.append(type(e).__name__)
+                    continue
+                with lock:
+                    read_ms.append((time.perf_counter() - start) * 1000)
+                offset += PAGE_SIZE * readers
+
+        def writer():
+            round_number = 0
+            while not stop.is_set():
+                try:
+                    write_batch(Session, books, round_number)
+                    writes[0] += 1
+                except Exception as e:
+                    with lock:
+                        errors.append(type(e).__name__)
+                round_number += 1
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    read_ms.sort()
+    return {
+        "reads": len(read_ms),
+        "p50": statistics.median(read_ms) if read_ms else 0.0,
+        "p99": read_ms[int(len(read_ms) * 0.99)] if read_ms else 0.0,
+        "max": read_ms[-1] if read_ms else 0.0,
+        "writes": writes[0],
+        "errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.books} books, {args.readers} reader threads + 1 writer, {args.seconds:g} s each")
+    for profile in ("static", "tuned"):
+        r = measure(profile, args.books, args.readers, args.seconds)
+        kinds = sorted(set(r["errors"]))
+        print(
+            f"{profile:<7} {r['reads'] / args.seconds:8.1f} reads/s  "
+            f"p50 {r['p50']:7.1f} ms  p99 {r['p99']:7.1f} ms  max {r['max']:7.1f} ms  "
+            f"{r['writes'] / args.seconds:6.1f} writes/s  {len(r['errors'])} errors"
+            + (f" ({', '.join(kinds)})" if kinds else "")
+        )
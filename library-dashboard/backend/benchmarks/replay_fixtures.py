@@ -0,0 +1,75 @@
+"""
+Replay recorded OverDrive search pages through the HTTP fast-path parser.
+
+Fixtures live in benchmarks/fixtures/overdrive/ and are named
+`<expected status>__<searched_title>.html`, where the expected status is an
+AvailabilityStatus value or `inconclusive` (parser should defer to the
+browser path). The title part is what results are matched against.
+Title pages, checked by a resolved media ID, are named
+`<expected status>__<searched_title>__<media_id>.html`; their result must
+be for that media ID.
+
+Usage (from the backend directory):
+    python -m benchmarks.replay_fixtures
+    python -m benchmarks.replay_fixtures --record <search_url> <expected>__<searched_title>
+"""
+from pathlib import Path
+from typing import Optional, Tuple
+import argparse
+import asyncio
+import sys
+import time
+
+from services.overdrive_http import parse_search_page, get_http_client, close_http_client
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "overdrive"
+
+
+def fixture_name(path: Path) -> Tuple[str, str, Optional[str]]:
+    """(expected status, searched title, media ID or None) from a fixture's file name."""
+    expected, title, *media_id = path.stem.split("__")
+    return expected, title.replace("_", " "), media_id[0] if media_id else None
+
+
+def replay() -> int:
+    """Parse every fixture and compare against its expected status."""
+    failures = 0
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        expected, title, media_id = fixture_name(path)
+        html = path.read_text(encoding="utf-8")
+
+        start = time.perf_counter()
+        result = parse_search_page(html, f"fixture://{path.name}", title, media_id=media_id)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        actual = result.status.value if result else "inconclusive"
+        if result and result.media_id:
+            actual_detail = f"{actual} ({result.media_id})"
+        else:
+            actual_detail = actual
+        ok = actual == expected and (not media_id or (result and result.media_id == media_id))
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {path.name:<45} {actual_detail:<22} {elapsed_ms:6.2f} ms")
+
+    return failures
+
+
+async def record(url: str, name: str):
+    """Save a live search page as a new fixture."""
+    response = await get_http_client().get(url)
+    response.raise_for_status()
+    path = FIXTURES_DIR / f"{name}.html"
+    path.write_text(response.text, encoding="utf-8")
+    await close_http_client()
+    print(f"Recorded {url} -> {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", nargs=2, metavar=("URL", "NAME"))
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(*args.record))
+    else:
+        sys.exit(1 if replay() else 0)
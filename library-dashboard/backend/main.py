@@ -1,15 +1,50 @@
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import os
 import uvicorn
 
 from models import init_db
 from routers import goodreads_router, libraries_router, availability_router, checkout_router
+from services import browser_pool, close_http_client, CheckWorker, availability_flights, result_writer
+
+# Run a check worker inside the API process; set to 0 when running worker.py separately
+EMBEDDED_CHECK_WORKER = os.getenv("EMBEDDED_CHECK_WORKER", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database, shared browser pool and check worker; tear down on shutdown."""
+    await init_db()
+    print("Database initialized")
+
+    await browser_pool.start()
+    print("Browser pool started")
+
+    worker_task = None
+    if EMBEDDED_CHECK_WORKER:
+        worker_task = asyncio.create_task(CheckWorker().run(asyncio.Event()))
+        print("Check worker started")
+
+    yield
+
+    if worker_task:
+        # Tasks it had claimed are picked up again once their lease expires
+        worker_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker_task
+    await result_writer.flush()
+    await browser_pool.stop()
+    await close_http_client()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Library Dashboard API",
     description="API for syncing Goodreads books and checking library availability",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS - allow all origins for development
@@ -29,13 +64,6 @@ app.include_router(availability_router)
 app.include_router(checkout_router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup."""
-    init_db()
-    print("Database initialized")
-
-
 @app.get("/")
 async def root():
     """Root endpoint - health check."""
@@ -48,8 +76,27 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint, with this process's availability-check coalescing and write stats."""
+    stats = availability_flights.stats
+    writes = result_writer.stats
+    return {
+        "status": "healthy",
+        "availability_checks": {
+            "executed": stats.executed,
+            "coalesced": stats.coalesced,
+            "hit_rate": round(stats.hit_rate, 3),
+            "in_flight": availability_flights.in_flight()
+        },
+        "result_writes": {
+            "flushes": writes.flushes,
+            "results": writes.rows,
+            "avg_batch": round(writes.avg_batch, 1),
+            "last_batch": writes.last_batch,
+            "avg_flush_ms": round(writes.avg_ms, 2),
+            "max_flush_ms": round(writes.max_ms, 2),
+            "pending": result_writer.pending()
+        }
+    }
 
 
 if __name__ == "__main__":
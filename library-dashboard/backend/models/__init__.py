@@ -1,20 +1,22 @@
-from .database import Base, User, Library, Book, AvailabilityCache, init_db, get_db, SessionLocal
+from .database import Base, User, Library, Book, AvailabilityCache, TitleResolution, FeedPageCache, CheckJob, CheckTask, init_db, get_db, SessionLocal
 from .schemas import (
     LibraryBase, LibraryCreate, LibraryUpdate, LibraryResponse,
-    BookBase, BookCreate, BookResponse, BookWithAvailability,
+    BookBase, BookCreate, BookResponse, BookWithAvailability, BookPage, BookCount,
+    LibraryStats, DashboardStats,
     AvailabilityBase, AvailabilityResponse,
     GoodreadsSyncRequest, GoodreadsSyncResponse,
-    AvailabilityCheckRequest, AvailabilityCheckAllResponse,
+    AvailabilityCheckRequest, AvailabilityCheckAllResponse, JobStatusResponse,
     CheckoutRequest, CheckoutResponse
 )
 
 __all__ = [
-    "Base", "User", "Library", "Book", "AvailabilityCache",
+    "Base", "User", "Library", "Book", "AvailabilityCache", "TitleResolution", "FeedPageCache", "CheckJob", "CheckTask",
     "init_db", "get_db", "SessionLocal",
     "LibraryBase", "LibraryCreate", "LibraryUpdate", "LibraryResponse",
-    "BookBase", "BookCreate", "BookResponse", "BookWithAvailability",
+    "BookBase", "BookCreate", "BookResponse", "BookWithAvailability", "BookPage", "BookCount",
+    "LibraryStats", "DashboardStats",
     "AvailabilityBase", "AvailabilityResponse",
     "GoodreadsSyncRequest", "GoodreadsSyncResponse",
-    "AvailabilityCheckRequest", "AvailabilityCheckAllResponse",
+    "AvailabilityCheckRequest", "AvailabilityCheckAllResponse", "JobStatusResponse",
     "CheckoutRequest", "CheckoutResponse"
 ]
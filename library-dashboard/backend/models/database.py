@@ -1,25 +1,97 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import bindparam, event, inspect, select, text, update, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, UniqueConstraint, Index
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from typing import AsyncIterator
 from datetime import datetime
+import logging
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./library_dashboard.db")
 
-# Handle SQLite - use StaticPool for better connection handling
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool  # Single connection reused - better for SQLite
+# Async driver used for each backend when DATABASE_URL doesn't name one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# SQLite tuning, applied to every pooled connection. WAL lets readers run
+# alongside the single writer instead of waiting for it to commit.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# NORMAL only fsyncs at WAL checkpoints - still safe against corruption in WAL mode
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB: 64 MB of page cache per connection
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+# How long a writer waits for the write lock before failing with "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Connections kept open for concurrent requests and the check worker. Requests
+# and workers hold theirs while awaiting checks, so overflow is generous.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "32"))
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Set the tuning pragmas on a new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def async_database_url(url: str) -> str:
+    """`url` with the async driver for its backend (sqlite:/// -> sqlite+aiosqlite:///)."""
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_sqlite_engine(url: str) -> AsyncEngine:
+    """
+    Async engine for a SQLite database with the tuning pragmas.
+
+    File databases get a connection pool, so concurrent requests and the
+    check worker each use their own connection; in-memory databases exist
+    only within one connection, so they keep a single shared one.
+    """
+    url = async_database_url(url)
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        return create_async_engine(url, poolclass=StaticPool)
+
+    sqlite_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
     )
+    event.listen(sqlite_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return sqlite_engine
+
+
+if DATABASE_URL.startswith("sqlite"):
+    engine = create_sqlite_engine(DATABASE_URL)
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_async_engine(
+        async_database_url(DATABASE_URL), pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Attributes can't be lazily reloaded under an AsyncSession, so objects
+# stay readable after a commit instead of being expired
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -32,6 +104,7 @@ class User(Base):
 
     libraries = relationship("Library", back_populates="user", cascade="all, delete-orphan")
     books = relationship("Book", back_populates="user", cascade="all, delete-orphan")
+    feed_pages = relationship("FeedPageCache", back_populates="user", cascade="all, delete-orphan")
 
 
 class Library(Base):
@@ -50,10 +123,18 @@ class Library(Base):
 
     user = relationship("User", back_populates="libraries")
     availability_cache = relationship("AvailabilityCache", back_populates="library", cascade="all, delete-orphan")
+    title_resolutions = relationship("TitleResolution", back_populates="library", cascade="all, delete-orphan")
 
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination and prefix filters on the books API
+        Index("ix_books_user_date_added", "user_id", "date_added", "id"),
+        Index("ix_books_user_title", "user_id", "title", "id"),
+        Index("ix_books_title_key", "title_key"),
+        Index("ix_books_author_key", "author_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -61,6 +142,8 @@ class Book(Base):
     title = Column(String(512), nullable=False)
     author = Column(String(255), nullable=True)
     isbn13 = Column(String(20), nullable=True)
+    title_key = Column(String(512), nullable=True)  # normalized for matching, set at sync
+    author_key = Column(String(255), nullable=True)  # normalized for matching, set at sync
     cover_url = Column(Text, nullable=True)
     date_added = Column(DateTime, nullable=True)
     shelf = Column(String(100), default="to-read")
@@ -69,10 +152,22 @@ class Book(Base):
 
     user = relationship("User", back_populates="books")
     availability_cache = relationship("AvailabilityCache", back_populates="book", cascade="all, delete-orphan")
+    title_resolutions = relationship("TitleResolution", back_populates="book", cascade="all, delete-orphan")
 
 
 class AvailabilityCache(Base):
     __tablename__ = "availability_cache"
+    __table_args__ = (
+        # One row per book x library; the conflict target of result upserts.
+        # A unique index rather than a constraint so existing databases can add it.
+        Index("uq_availability_cache_book_library", "book_id", "library_id", unique=True),
+        # Status filters ("available anywhere") on the books API, and covers
+        # the dashboard stats aggregate without touching the table
+        Index(
+            "ix_availability_cache_book_status_covering",
+            "book_id", "status", "library_id", "expires_at", "checked_at"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
@@ -88,15 +183,182 @@ class AvailabilityCache(Base):
     library = relationship("Library", back_populates="availability_cache")
 
 
-def init_db():
+class TitleResolution(Base):
+    """Which OverDrive title (media ID) a book resolved to at a library."""
+    __tablename__ = "title_resolutions"
+    __table_args__ = (
+        UniqueConstraint("book_id", "library_id", name="uq_title_resolution_book_library"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    library_id = Column(Integer, ForeignKey("libraries.id"), nullable=False)
+    media_id = Column(String(50), nullable=False)
+    confidence = Column(Float, nullable=True)  # 0-1 title match score of the resolving search
+    strategy = Column(String(20), nullable=True)  # isbn, asin, title
+    resolved_at = Column(DateTime, default=datetime.utcnow)
+
+    book = relationship("Book", back_populates="title_resolutions")
+    library = relationship("Library", back_populates="title_resolutions")
+
+
+class FeedPageCache(Base):
+    """HTTP validators and content hash of one fetched Goodreads feed page."""
+    __tablename__ = "feed_page_cache"
+    __table_args__ = (
+        UniqueConstraint("user_id", "url", name="uq_feed_page_cache_user_url"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    url = Column(String(1024), nullable=False)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of the response body
+    book_keys = Column(Text, nullable=True)  # JSON list of the page's feed keys
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="feed_pages")
+
+
+class CheckJob(Base):
+    """A "check all books" run, tracked in the database so any process can report on it."""
+    __tablename__ = "check_jobs"
+
+    id = Column(String(36), primary_key=True)  # uuid4
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Set while queued/running, cleared when finished - one active job per key
+    active_key = Column(String(100), unique=True, nullable=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed
+    total = Column(Integer, default=0)
+    done = Column(Integer, default=0)  # tasks finished, including failed ones
+    failed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    tasks = relationship("CheckTask", back_populates="job", cascade="all, delete-orphan")
+
+
+class CheckTask(Base):
+    """One book x library check of a job, claimed by a worker under a time-limited lease."""
+    __tablename__ = "check_tasks"
+    __table_args__ = (
+        UniqueConstraint("job_id", "book_id", "library_id", name="uq_check_task_job_book_library"),
+        # Claim query: next pending (or expired) tasks in order
+        Index("ix_check_tasks_status_claimed", "status", "claimed_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), ForeignKey("check_jobs.id"), nullable=False, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    library_id = Column(Integer, ForeignKey("libraries.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, claimed, done, error
+    attempts = Column(Integer, default=0)
+    claimed_by = Column(String(100), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+
+    job = relationship("CheckJob", back_populates="tasks")
+
+
+# Which duplicate row survives when a new unique index is added to a table
+# that already has duplicates (default: the newest by id)
+DEDUPE_KEEP_ORDER = {
+    "availability_cache": "checked_at DESC NULLS LAST, id DESC",
+}
+
+
+def _drop_duplicates(conn, table, index) -> int:
+    """Delete rows that would violate a unique index, keeping one per key."""
+    columns = ", ".join(column.name for column in index.columns)
+    order = DEDUPE_KEEP_ORDER.get(table.name, "id DESC")
+    result = conn.execute(text(
+        f"DELETE FROM {table.name} WHERE id IN ("
+        f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {columns} ORDER BY {order}) AS position "
+        f"FROM {table.name}) ranked WHERE position > 1)"
+    ))
+    return result.rowcount
+
+
+def _backfill_book_keys(conn) -> int:
+    """Recompute books' title/author keys that are missing or from an older normalization."""
+    # Imported here because the services package imports this module
+    from services.title_matcher import normalize_title, normalize_author
+
+    books = Book.__table__
+    changed = []
+    for row in conn.execute(select(books.c.id, books.c.title, books.c.author, books.c.title_key, books.c.author_key)):
+        title_key = normalize_title(row.title)
+        author_key = normalize_author(row.author)
+        if (row.title_key, row.author_key) != (title_key, author_key):
+            changed.append({"book_id": row.id, "new_title_key": title_key, "new_author_key": author_key})
+    if changed:
+        conn.execute(
+            update(books)
+            .where(books.c.id == bindparam("book_id"))
+            .values(title_key=bindparam("new_title_key"), author_key=bindparam("new_author_key")),
+            changed
+        )
+    return len(changed)
+
+
+# Indexes an earlier schema created that are now redundant, by table
+OBSOLETE_INDEXES = {
+    "availability_cache": [
+        "ix_availability_cache_expires_at",
+        "ix_availability_cache_book_status",
+        "ix_availability_cache_stats",
+    ],
+}
+
+
+def _upgrade_schema(conn):
+    """
+    Add nullable columns and indexes that were introduced after a table was
+    created, and drop obsolete indexes.
+
+    create_all() only creates missing tables, so existing databases would
+    otherwise lack newer columns and indexes. Duplicate rows are removed
+    before a new unique index is created on them. Books stored before
+    their title/author keys existed, or under an older normalization, get
+    them recomputed.
+    """
+    # Inspect through this transaction's connection, which also sees its uncommitted changes
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.unique and index.name not in existing_indexes:
+                dropped = _drop_duplicates(conn, table, index)
+                if dropped:
+                    logger.info(f"Removed {dropped} duplicate rows from {table.name} for {index.name}")
+            index.create(bind=conn, checkfirst=True)
+        for name in OBSOLETE_INDEXES.get(table.name, []):
+            if name in existing_indexes:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+    backfilled = _backfill_book_keys(conn)
+    if backfilled:
+        logger.info(f"Recomputed title/author keys of {backfilled} books")
+
+
+async def init_db():
     """Create all database tables."""
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade_schema)
 
 
-def get_db():
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Dependency to get database session."""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
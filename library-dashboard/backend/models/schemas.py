@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -75,14 +75,43 @@ class BookWithAvailability(BookResponse):
     availability: List[AvailabilityResponse] = []
 
 
+class BookPage(BaseModel):
+    items: List[BookWithAvailability]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
+
+class BookCount(BaseModel):
+    count: int
+
+
+class LibraryStats(BaseModel):
+    library_id: int
+    library_name: str
+    checked: int  # books with a cached result at this library
+    by_status: Dict[str, int]
+
+
+class DashboardStats(BaseModel):
+    total_books: int
+    available_anywhere: int  # books available at one or more libraries
+    stale: int  # cached results past their expiry
+    last_refreshed_at: Optional[datetime] = None
+    by_status: Dict[str, int]  # cached results per status, across libraries
+    by_library: List[LibraryStats]
+
+
 # Goodreads schemas
 class GoodreadsSyncRequest(BaseModel):
     rss_url: str
 
 
 class GoodreadsSyncResponse(BaseModel):
-    books_synced: int
-    books: List[BookResponse]
+    books_synced: int  # books on the shelf after the sync
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    not_modified: bool = False  # feed unchanged since the last sync; nothing was parsed or written
 
 
 # Availability check schemas
@@ -95,6 +124,15 @@ class AvailabilityCheckAllResponse(BaseModel):
     message: str
 
 
+class JobStatusResponse(BaseModel):
+    status: str  # queued, running, completed
+    progress: int  # percent of checks finished
+    total: int
+    done: int
+    failed: int
+    eta_seconds: Optional[float] = None  # estimated time left while running
+
+
 # Checkout schemas
 class CheckoutRequest(BaseModel):
     book_id: int
@@ -1,149 +1,123 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import AsyncIterator, Dict, List, Tuple
 from datetime import datetime, timedelta
-import uuid
 import asyncio
+import os
 
 from models import (
-    get_db, User, Book, Library, AvailabilityCache,
-    AvailabilityCheckRequest, AvailabilityResponse, AvailabilityCheckAllResponse
+    get_db, SessionLocal, User, Book, Library, AvailabilityCache,
+    AvailabilityCheckRequest, AvailabilityResponse, AvailabilityCheckAllResponse,
+    DashboardStats, LibraryStats, JobStatusResponse
+)
+from services import (
+    check_availability, AvailabilityStatus,
+    load_resolutions, usable_media_id, record_resolution,
+    book_match_key, is_cache_fresh, result_writer,
+    enqueue_check_all, get_job, job_eta_seconds, job_notifier
 )
-from services import check_availability, AvailabilityStatus
 
 router = APIRouter(prefix="/api/availability", tags=["availability"])
 
 # For MVP, use a single default user
 DEFAULT_USER_ID = 1
 
-# Cache duration in hours
-CACHE_DURATION_HOURS = 4
+# How often a job stream re-reads the database when no local worker wakes it
+JOB_STREAM_POLL_SECONDS = float(os.getenv("JOB_STREAM_POLL_SECONDS", "1"))
+
+# Keep-alive comment interval, so proxies don't close a quiet stream
+JOB_STREAM_KEEPALIVE_SECONDS = 15
 
-# Track running jobs
-running_jobs = {}
+# Results are re-read this far behind the newest one sent, since a result
+# stamped earlier can be committed after a later one by another worker
+JOB_STREAM_RESULT_WINDOW = timedelta(seconds=10)
 
 
-def get_or_create_default_user(db: Session) -> User:
+async def get_or_create_default_user(db: AsyncSession) -> User:
     """Get or create the default user for MVP."""
-    user = db.query(User).filter(User.id == DEFAULT_USER_ID).first()
+    user = await db.get(User, DEFAULT_USER_ID)
     if not user:
         user = User(id=DEFAULT_USER_ID, email="default@local")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
-async def check_book_availability(book: Book, libraries: List[Library], db: Session):
-    """Check availability of a single book across all libraries."""
-    results = []
+async def load_book_caches(db: AsyncSession, book_id: int) -> Dict[int, AvailabilityCache]:
+    """A book's cached results with their libraries, keyed by library_id, re-read from the database."""
+    caches = await db.scalars(
+        select(AvailabilityCache)
+        .options(joinedload(AvailabilityCache.library))
+        .where(AvailabilityCache.book_id == book_id)
+        # Rows already in the session may have been rewritten by the result writer
+        .execution_options(populate_existing=True)
+    )
+    return {cache.library_id: cache for cache in caches}
 
-    for library in libraries:
-        if not library.is_active:
-            continue
 
-        # Check cache first
-        cache = db.query(AvailabilityCache).filter(
-            AvailabilityCache.book_id == book.id,
-            AvailabilityCache.library_id == library.id
-        ).first()
+async def check_book_availability(book: Book, libraries: List[Library], db: AsyncSession):
+    """
+    Check availability of a single book across all libraries.
 
-        # Use cache if fresh
-        if cache and cache.expires_at and cache.expires_at > datetime.utcnow():
-            results.append(cache)
-            continue
+    Libraries without a fresh cached result are checked concurrently, and
+    their results are written together by the result writer.
+    """
+    libraries = [library for library in libraries if library.is_active]
+    caches = await load_book_caches(db, book.id)
+    resolutions = await load_resolutions(db, [book.id])
+    wanted = book_match_key(book)
 
-        # Perform availability check
-        result = await check_availability(
+    async def check(library: Library):
+        # By media ID if this title was resolved at the library before
+        return await check_availability(
             base_url=library.base_url,
             title=book.title,
-            author=book.author
+            author=book.author,
+            isbn=book.isbn13,
+            media_id=usable_media_id(resolutions.get((book.id, library.id))),
+            wanted=wanted
         )
 
-        # Update or create cache entry
-        if cache:
-            cache.status = result.status.value
-            cache.search_url = result.search_url
-            cache.libby_url = result.libby_url
-            cache.checked_at = datetime.utcnow()
-            cache.expires_at = datetime.utcnow() + timedelta(hours=CACHE_DURATION_HOURS)
-            if result.status == AvailabilityStatus.ERROR:
-                cache.consecutive_failures += 1
-            else:
-                cache.consecutive_failures = 0
-        else:
-            cache = AvailabilityCache(
-                book_id=book.id,
-                library_id=library.id,
-                status=result.status.value,
-                search_url=result.search_url,
-                libby_url=result.libby_url,
-                checked_at=datetime.utcnow(),
-                expires_at=datetime.utcnow() + timedelta(hours=CACHE_DURATION_HOURS),
-                consecutive_failures=1 if result.status == AvailabilityStatus.ERROR else 0
-            )
-            db.add(cache)
-
-        db.commit()
-        db.refresh(cache)
-        results.append(cache)
-
-    return results
-
-
-async def check_all_books_task(job_id: str, user_id: int):
-    """Background task to check availability for all books."""
-    from models.database import SessionLocal
-
-    db = SessionLocal()
-    try:
-        running_jobs[job_id] = {"status": "running", "progress": 0}
-
-        books = db.query(Book).filter(Book.user_id == user_id).all()
-        libraries = db.query(Library).filter(
-            Library.user_id == user_id,
-            Library.is_active == True
-        ).all()
-
-        if not books or not libraries:
-            running_jobs[job_id] = {"status": "completed", "progress": 100}
-            return
-
-        total = len(books)
-        for i, book in enumerate(books):
-            await check_book_availability(book, libraries, db)
-            running_jobs[job_id]["progress"] = int((i + 1) / total * 100)
-            # Small delay between books to avoid rate limiting
-            await asyncio.sleep(0.5)
-
-        running_jobs[job_id] = {"status": "completed", "progress": 100}
+    stale = [library for library in libraries if not is_cache_fresh(caches.get(library.id))]
+    if stale:
+        results = await asyncio.gather(*(check(library) for library in stale))
+        written = [result_writer.add(book.id, library.id, result) for library, result in zip(stale, results)]
+        # Every result is in; write them now rather than waiting out the flush timer
+        await result_writer.flush()
+        await asyncio.gather(*written)
+        for library, result in zip(stale, results):
+            key = (book.id, library.id)
+            resolutions[key] = await record_resolution(db, book.id, library.id, resolutions.get(key), result)
+        await db.commit()
+        caches = await load_book_caches(db, book.id)
 
-    except Exception as e:
-        running_jobs[job_id] = {"status": "error", "error": str(e)}
-    finally:
-        db.close()
+    return [caches[library.id] for library in libraries if library.id in caches]
 
 
 @router.post("/check", response_model=List[AvailabilityResponse])
 async def check_single_book(
     request: AvailabilityCheckRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Check availability for a single book across all libraries."""
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    book = db.query(Book).filter(
+    book = await db.scalar(select(Book).where(
         Book.id == request.book_id,
         Book.user_id == user.id
-    ).first()
+    ))
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    libraries = db.query(Library).filter(
+    libraries = (await db.scalars(select(Library).where(
         Library.user_id == user.id,
         Library.is_active == True
-    ).all()
+    ))).all()
 
     if not libraries:
         raise HTTPException(status_code=400, detail="No libraries configured")
@@ -165,44 +139,222 @@ async def check_single_book(
 
 
 @router.post("/check-all", response_model=AvailabilityCheckAllResponse)
-async def check_all_books(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Start a background job to check availability for all books."""
-    user = get_or_create_default_user(db)
+async def check_all_books(db: AsyncSession = Depends(get_db)):
+    """
+    Queue a check of every stale book x library pair.
+
+    Checks are run by the check workers; if a check-all job is already
+    queued or running for this user, that job is returned instead.
+    """
+    user = await get_or_create_default_user(db)
 
-    job_id = str(uuid.uuid4())
-    background_tasks.add_task(check_all_books_task, job_id, user.id)
+    job, created = await enqueue_check_all(db, user.id)
 
     return AvailabilityCheckAllResponse(
-        job_id=job_id,
-        message="Availability check started"
+        job_id=job.id,
+        message="Availability check started" if created else "Availability check already running"
+    )
+
+
+def job_status_response(job) -> JobStatusResponse:
+    return JobStatusResponse(
+        status=job.status,
+        progress=100 if job.status == "completed" or not job.total else int(job.done / job.total * 100),
+        total=job.total,
+        done=job.done,
+        failed=job.failed,
+        eta_seconds=job_eta_seconds(job)
     )
 
 
-@router.get("/job/{job_id}")
-async def get_job_status(job_id: str):
+@router.get("/job/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, db: AsyncSession = Depends(get_db)):
     """Get status of a background availability check job."""
-    if job_id not in running_jobs:
+    job = await get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job_status_response(job)
+
+
+def server_sent_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def job_event_stream(job_id: str) -> AsyncIterator[str]:
+    """
+    Server-sent events for a job until it completes.
+
+    `result` events carry each availability result (an AvailabilityResponse)
+    written since the job was queued, `progress` events a JobStatusResponse
+    whenever the counts change, and a final `end` event tells the client
+    to close instead of reconnecting.
+    """
+    sent: Dict[Tuple[int, int], datetime] = {}
+    newest = None
+    last_progress = None
+    idle = 0.0
+
+    with job_notifier.subscribe(job_id) as changed:
+        while True:
+            changed.clear()
+            async with SessionLocal() as db:
+                # Job first, so every result written before it completed is read below
+                job = await get_job(db, job_id)
+                if not job:
+                    yield server_sent_event("end", "{}")
+                    return
+
+                since = newest - JOB_STREAM_RESULT_WINDOW if newest else job.created_at
+                rows = (await db.execute(
+                    select(AvailabilityCache, Library.name)
+                    .join(Library, AvailabilityCache.library_id == Library.id)
+                    .join(Book, AvailabilityCache.book_id == Book.id)
+                    .where(Book.user_id == job.user_id, AvailabilityCache.checked_at >= since)
+                    .order_by(AvailabilityCache.checked_at)
+                )).all()
+
+                events = []
+                for cache, library_name in rows:
+                    key = (cache.book_id, cache.library_id)
+                    if sent.get(key) == cache.checked_at:
+                        continue
+                    sent[key] = cache.checked_at
+                    newest = max(newest or cache.checked_at, cache.checked_at)
+                    events.append(server_sent_event("result", AvailabilityResponse(
+                        book_id=cache.book_id,
+                        library_id=cache.library_id,
+                        library_name=library_name,
+                        status=cache.status,
+                        search_url=cache.search_url,
+                        libby_url=cache.libby_url,
+                        checked_at=cache.checked_at
+                    ).model_dump_json()))
+
+                progress = job_status_response(job)
+                if progress.model_dump(exclude={"eta_seconds"}) != last_progress:
+                    last_progress = progress.model_dump(exclude={"eta_seconds"})
+                    events.append(server_sent_event("progress", progress.model_dump_json()))
+                completed = job.status == "completed"
+
+            if newest:
+                # Results outside the re-read window can't come back, so stop tracking them
+                horizon = newest - JOB_STREAM_RESULT_WINDOW
+                sent = {key: checked_at for key, checked_at in sent.items() if checked_at >= horizon}
+
+            for event in events:
+                yield event
+            if completed:
+                yield server_sent_event("end", "{}")
+                return
+
+            if events:
+                idle = 0.0
+            elif idle >= JOB_STREAM_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=JOB_STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                idle += JOB_STREAM_POLL_SECONDS
+
+
+@router.get("/job/{job_id}/stream")
+async def stream_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Stream a job's results and progress as server-sent events.
+
+    Lets the dashboard update each badge as its check finishes instead of
+    polling the job and reloading every book at the end.
+    """
+    if not await get_job(db, job_id):
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return running_jobs[job_id]
+    return StreamingResponse(
+        job_event_stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats", response_model=DashboardStats)
+async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Shelf-wide availability counts for the dashboard header.
+
+    One statement: books LEFT JOIN availability_cache grouped by
+    (library, status), with the book totals as scalar subqueries. Books
+    never checked show up as the group with no library.
+    """
+    user = await get_or_create_default_user(db)
+    now = datetime.utcnow()
+
+    user_books = select(Book.id).where(Book.user_id == user.id)
+    total_books = select(func.count()).select_from(user_books.subquery()).scalar_subquery()
+    available_anywhere = select(func.count(func.distinct(AvailabilityCache.book_id))).where(
+        AvailabilityCache.book_id.in_(user_books),
+        AvailabilityCache.status == AvailabilityStatus.AVAILABLE.value
+    ).scalar_subquery()
+
+    is_stale = or_(AvailabilityCache.expires_at.is_(None), AvailabilityCache.expires_at <= now)
+    rows = (await db.execute(
+        select(
+            AvailabilityCache.library_id,
+            Library.name,
+            AvailabilityCache.status,
+            func.count(AvailabilityCache.id),
+            func.sum(case((and_(AvailabilityCache.id.isnot(None), is_stale), 1), else_=0)),
+            func.max(AvailabilityCache.checked_at),
+            total_books,
+            available_anywhere,
+        )
+        .select_from(Book)
+        .outerjoin(AvailabilityCache, AvailabilityCache.book_id == Book.id)
+        .outerjoin(Library, Library.id == AvailabilityCache.library_id)
+        .where(Book.user_id == user.id)
+        .group_by(AvailabilityCache.library_id, Library.name, AvailabilityCache.status)
+    )).all()
+
+    stats = DashboardStats(
+        total_books=rows[0][6] if rows else 0,
+        available_anywhere=rows[0][7] if rows else 0,
+        stale=0,
+        by_status={},
+        by_library=[]
+    )
+    libraries = {}
+    for library_id, library_name, status, count, stale, checked_at, _, _ in rows:
+        if library_id is None:
+            continue
+        stats.stale += stale or 0
+        stats.by_status[status] = stats.by_status.get(status, 0) + count
+        if checked_at and (not stats.last_refreshed_at or checked_at > stats.last_refreshed_at):
+            stats.last_refreshed_at = checked_at
+        if library_id not in libraries:
+            libraries[library_id] = LibraryStats(
+                library_id=library_id, library_name=library_name, checked=0, by_status={}
+            )
+        libraries[library_id].checked += count
+        libraries[library_id].by_status[status] = count
+    stats.by_library = list(libraries.values())
+    return stats
 
 
 @router.get("/{book_id}", response_model=List[AvailabilityResponse])
-async def get_cached_availability(book_id: int, db: Session = Depends(get_db)):
+async def get_cached_availability(book_id: int, db: AsyncSession = Depends(get_db)):
     """Get cached availability for a book."""
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    book = db.query(Book).filter(
+    book = await db.scalar(select(Book).where(
         Book.id == book_id,
         Book.user_id == user.id
-    ).first()
+    ))
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
+    caches = (await load_book_caches(db, book.id)).values()
+
     return [
         AvailabilityResponse(
             book_id=cache.book_id,
@@ -213,5 +365,5 @@ async def get_cached_availability(book_id: int, db: Session = Depends(get_db)):
             libby_url=cache.libby_url,
             checked_at=cache.checked_at
         )
-        for cache in book.availability_cache
+        for cache in caches
     ]
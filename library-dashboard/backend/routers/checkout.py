@@ -1,49 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from playwright.async_api import async_playwright
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from urllib.parse import urlparse
+import logging
 
 from models import get_db, User, Book, Library, AvailabilityCache, CheckoutRequest, CheckoutResponse
-from services import login_to_library, perform_checkout, build_search_url
+from services import (
+    login_to_library, perform_checkout, build_search_url, build_title_url, browser_pool,
+    install_resource_blocking, CHECKOUT_POLICY, wait_for_search_results,
+    get_resolution, usable_media_id
+)
 from utils import decrypt_value
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/checkout", tags=["checkout"])
 
 # For MVP, use a single default user
 DEFAULT_USER_ID = 1
 
 
-def get_or_create_default_user(db: Session) -> User:
+async def get_or_create_default_user(db: AsyncSession) -> User:
     """Get or create the default user for MVP."""
-    user = db.query(User).filter(User.id == DEFAULT_USER_ID).first()
+    user = await db.get(User, DEFAULT_USER_ID)
     if not user:
         user = User(id=DEFAULT_USER_ID, email="default@local")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
 @router.post("/borrow", response_model=CheckoutResponse)
-async def borrow_book(request: CheckoutRequest, db: Session = Depends(get_db)):
+async def borrow_book(request: CheckoutRequest, db: AsyncSession = Depends(get_db)):
     """
     Attempt to borrow a book from a library.
 
     This will log in to the library and try to borrow the book automatically.
     """
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    book = db.query(Book).filter(
+    book = await db.scalar(select(Book).where(
         Book.id == request.book_id,
         Book.user_id == user.id
-    ).first()
+    ))
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    library = db.query(Library).filter(
+    library = await db.scalar(select(Library).where(
         Library.id == request.library_id,
         Library.user_id == user.id
-    ).first()
+    ))
 
     if not library:
         raise HTTPException(status_code=404, detail="Library not found")
@@ -59,54 +67,55 @@ async def borrow_book(request: CheckoutRequest, db: Session = Depends(get_db)):
     card_number = decrypt_value(library.card_number)
     pin = decrypt_value(library.pin)
 
-    # Build search URL
-    search_url = build_search_url(library.base_url, book.title, book.author)
+    # Go straight to the title page if we know its media ID, else search
+    media_id = usable_media_id(await get_resolution(db, book.id, library.id))
+    if media_id:
+        search_url = build_title_url(library.base_url, media_id)
+    else:
+        search_url = build_search_url(library.base_url, book.title, book.author)
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 720}
+        async with browser_pool.page(viewport={'width': 1280, 'height': 720}) as page:
+            # Skip images, fonts and media; keep scripts in case login needs them
+            resource_stats = await install_resource_blocking(
+                page, CHECKOUT_POLICY, urlparse(library.base_url).hostname
             )
-            page = await context.new_page()
 
-            try:
-                # Navigate to search page
-                await page.goto(search_url, timeout=30000)
-                await page.wait_for_timeout(2000)
+            # Navigate to search page
+            await page.goto(search_url, timeout=30000)
+            _, ready_ms = await wait_for_search_results(page)
 
-                # Try to log in
-                login_success, login_message = await login_to_library(page, card_number, pin)
+            # Try to log in
+            login_success, login_message = await login_to_library(page, card_number, pin)
 
-                if not login_success:
-                    return CheckoutResponse(
-                        success=False,
-                        message=f"Login failed: {login_message}",
-                        action_taken="login_attempt"
-                    )
+            if not login_success:
+                return CheckoutResponse(
+                    success=False,
+                    message=f"Login failed: {login_message}",
+                    action_taken="login_attempt"
+                )
 
-                # Try to borrow
-                borrow_success, borrow_message = await perform_checkout(page, "borrow")
+            # Try to borrow
+            borrow_success, borrow_message = await perform_checkout(page, "borrow")
 
-                if borrow_success:
-                    # Update availability cache
-                    cache = db.query(AvailabilityCache).filter(
-                        AvailabilityCache.book_id == book.id,
-                        AvailabilityCache.library_id == library.id
-                    ).first()
+            if borrow_success:
+                # Update availability cache
+                cache = await db.scalar(select(AvailabilityCache).where(
+                    AvailabilityCache.book_id == book.id,
+                    AvailabilityCache.library_id == library.id
+                ))
 
-                    if cache:
-                        cache.status = "borrowed"
-                        db.commit()
+                if cache:
+                    cache.status = "borrowed"
+                    await db.commit()
 
-                return CheckoutResponse(
-                    success=borrow_success,
-                    message=borrow_message,
-                    action_taken="borrow"
-                )
+            logger.info(f"borrow {search_url}: ready in {ready_ms:.0f} ms, {resource_stats.summary()}")
 
-            finally:
-                await browser.close()
+            return CheckoutResponse(
+                success=borrow_success,
+                message=borrow_message,
+                action_taken="borrow"
+            )
 
     except Exception as e:
         return CheckoutResponse(
@@ -117,26 +126,26 @@ async def borrow_book(request: CheckoutRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/hold", response_model=CheckoutResponse)
-async def place_hold(request: CheckoutRequest, db: Session = Depends(get_db)):
+async def place_hold(request: CheckoutRequest, db: AsyncSession = Depends(get_db)):
     """
     Attempt to place a hold on a book.
 
     This will log in to the library and try to place a hold automatically.
     """
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    book = db.query(Book).filter(
+    book = await db.scalar(select(Book).where(
         Book.id == request.book_id,
         Book.user_id == user.id
-    ).first()
+    ))
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    library = db.query(Library).filter(
+    library = await db.scalar(select(Library).where(
         Library.id == request.library_id,
         Library.user_id == user.id
-    ).first()
+    ))
 
     if not library:
         raise HTTPException(status_code=404, detail="Library not found")
@@ -152,54 +161,55 @@ async def place_hold(request: CheckoutRequest, db: Session = Depends(get_db)):
     card_number = decrypt_value(library.card_number)
     pin = decrypt_value(library.pin)
 
-    # Build search URL
-    search_url = build_search_url(library.base_url, book.title, book.author)
+    # Go straight to the title page if we know its media ID, else search
+    media_id = usable_media_id(await get_resolution(db, book.id, library.id))
+    if media_id:
+        search_url = build_title_url(library.base_url, media_id)
+    else:
+        search_url = build_search_url(library.base_url, book.title, book.author)
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 720}
+        async with browser_pool.page(viewport={'width': 1280, 'height': 720}) as page:
+            # Skip images, fonts and media; keep scripts in case login needs them
+            resource_stats = await install_resource_blocking(
+                page, CHECKOUT_POLICY, urlparse(library.base_url).hostname
             )
-            page = await context.new_page()
 
-            try:
-                # Navigate to search page
-                await page.goto(search_url, timeout=30000)
-                await page.wait_for_timeout(2000)
+            # Navigate to search page
+            await page.goto(search_url, timeout=30000)
+            _, ready_ms = await wait_for_search_results(page)
 
-                # Try to log in
-                login_success, login_message = await login_to_library(page, card_number, pin)
+            # Try to log in
+            login_success, login_message = await login_to_library(page, card_number, pin)
 
-                if not login_success:
-                    return CheckoutResponse(
-                        success=False,
-                        message=f"Login failed: {login_message}",
-                        action_taken="login_attempt"
-                    )
+            if not login_success:
+                return CheckoutResponse(
+                    success=False,
+                    message=f"Login failed: {login_message}",
+                    action_taken="login_attempt"
+                )
 
-                # Try to place hold
-                hold_success, hold_message = await perform_checkout(page, "hold")
+            # Try to place hold
+            hold_success, hold_message = await perform_checkout(page, "hold")
 
-                if hold_success:
-                    # Update availability cache
-                    cache = db.query(AvailabilityCache).filter(
-                        AvailabilityCache.book_id == book.id,
-                        AvailabilityCache.library_id == library.id
-                    ).first()
+            if hold_success:
+                # Update availability cache
+                cache = await db.scalar(select(AvailabilityCache).where(
+                    AvailabilityCache.book_id == book.id,
+                    AvailabilityCache.library_id == library.id
+                ))
 
-                    if cache:
-                        cache.status = "hold_placed"
-                        db.commit()
+                if cache:
+                    cache.status = "hold_placed"
+                    await db.commit()
 
-                return CheckoutResponse(
-                    success=hold_success,
-                    message=hold_message,
-                    action_taken="hold"
-                )
+            logger.info(f"hold {search_url}: ready in {ready_ms:.0f} ms, {resource_stats.summary()}")
 
-            finally:
-                await browser.close()
+            return CheckoutResponse(
+                success=hold_success,
+                message=hold_message,
+                action_taken="hold"
+            )
 
     except Exception as e:
         return CheckoutResponse(
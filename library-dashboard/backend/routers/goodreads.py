@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy import and_, or_, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import base64
+import json
 import logging
 
 from models import (
-    get_db, User, Book,
-    GoodreadsSyncRequest, BookResponse, BookWithAvailability, AvailabilityResponse
+    get_db, User, Book, AvailabilityCache,
+    GoodreadsSyncRequest, GoodreadsSyncResponse, BookWithAvailability, AvailabilityResponse,
+    BookPage, BookCount
+)
+from services import (
+    iter_goodreads_pages, validate_rss_url, normalize_goodreads_input,
+    normalize_title, normalize_author, STOPWORDS, ShelfSync, load_feed_pages, save_feed_pages,
+    clear_feed_pages, iter_export_chunks, EXPORT_FIELDS
 )
-from services import fetch_goodreads_rss, validate_rss_url, normalize_goodreads_input
 
 logger = logging.getLogger(__name__)
 
@@ -17,88 +28,143 @@ router = APIRouter(prefix="/api/goodreads", tags=["goodreads"])
 DEFAULT_USER_ID = 1
 
 
-def get_or_create_default_user(db: Session) -> User:
+async def get_or_create_default_user(db: AsyncSession) -> User:
     """Get or create the default user for MVP."""
-    user = db.query(User).filter(User.id == DEFAULT_USER_ID).first()
+    user = await db.get(User, DEFAULT_USER_ID)
     if not user:
         user = User(id=DEFAULT_USER_ID, email="default@local")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
-@router.post("/sync", response_model=List[BookResponse])
-async def sync_goodreads(request: GoodreadsSyncRequest, db: Session = Depends(get_db)):
+@router.post("/sync", response_model=GoodreadsSyncResponse)
+async def sync_goodreads(request: GoodreadsSyncRequest, db: AsyncSession = Depends(get_db)):
     """
     Sync books from Goodreads RSS feed.
 
-    Fetches the RSS feed, parses books, and stores them in the database.
+    Fetches every page of the RSS feed and applies only the differences to
+    the stored books, so cached availability for books still on the shelf
+    is kept. Pages are requested conditionally; when none has changed,
+    nothing is parsed or written.
     """
     # Normalize input (profile URL, user ID, or RSS URL)
     rss_url = normalize_goodreads_input(request.rss_url)
     logger.info(f"Syncing Goodreads - Input: '{request.rss_url}' -> RSS URL: '{rss_url}'")
 
+    # Get or create default user
+    user = await get_or_create_default_user(db)
+
+    # Update user's RSS URL
+    user.goodreads_rss_url = request.rss_url
+
+    # Write each changed feed page as it arrives; removals wait for the full feed
+    shelf_sync = await ShelfSync.start(db, user.id)
+    pages = []
     try:
-        # Fetch books from RSS
-        parsed_books = await fetch_goodreads_rss(rss_url)
-        logger.info(f"Fetched {len(parsed_books)} books from RSS feed")
+        async for page in iter_goodreads_pages(rss_url, await load_feed_pages(db, user.id)):
+            if page.unchanged:
+                shelf_sync.keep(page.book_keys)
+            else:
+                await shelf_sync.apply(page.books)
+            pages.append(page)
     except Exception as e:
         logger.error(f"Failed to fetch RSS feed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch RSS feed: {str(e)}")
 
-    # Get or create default user
-    user = get_or_create_default_user(db)
+    diff = await shelf_sync.finish()
+    if db.is_modified(user):
+        await db.commit()
+    not_modified = all(page.unchanged for page in pages) and not diff.changed
+    await save_feed_pages(db, user.id, pages)
+    logger.info(f"Fetched {diff.total} books from RSS feed" + (" (not modified)" if not_modified else ""))
 
-    # Update user's RSS URL
-    user.goodreads_rss_url = request.rss_url
+    return GoodreadsSyncResponse(
+        books_synced=diff.total,
+        added=len(diff.added),
+        updated=len(diff.updated),
+        removed=len(diff.removed),
+        unchanged=diff.unchanged,
+        not_modified=not_modified
+    )
 
-    # Delete all existing books for this user (replace instead of merge)
-    db.query(Book).filter(Book.user_id == user.id).delete()
-    db.commit()
 
-    # Add fresh books from RSS
-    synced_books = []
+@router.post("/import-csv", response_model=GoodreadsSyncResponse)
+async def import_goodreads_csv(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    """
+    Import the to-read shelf from a Goodreads "Export Library" CSV.
 
-    for parsed in parsed_books:
-        # Create new book
-        book = Book(
-            user_id=user.id,
-            goodreads_id=parsed.goodreads_id,
-            title=parsed.title,
-            author=parsed.author,
-            isbn13=parsed.isbn13,
-            cover_url=parsed.cover_url,
-            date_added=parsed.date_added,
-            shelf=parsed.shelf
-        )
-        db.add(book)
-        synced_books.append(book)
+    Unlike the RSS feed the export has no size limit. It is parsed in
+    chunks, each written as it is parsed, and replaces the shelf the same
+    way a sync does. Parsing runs in a worker thread, off the event loop.
+    """
+    user = await get_or_create_default_user(db)
 
-    db.commit()
+    shelf_sync = await ShelfSync.start(db, user.id)
+    chunks = iter_export_chunks(file.file)
+    imported = 0
+    try:
+        while True:
+            books = await asyncio.to_thread(next, chunks, None)
+            if books is None:
+                break
+            imported += len(books)
+            await shelf_sync.apply(books, fields=EXPORT_FIELDS)
+    except (ValueError, UnicodeError) as e:
+        logger.error(f"Failed to parse Goodreads export {file.filename}: {e}")
+        raise HTTPException(status_code=400, detail=f"Failed to parse CSV export: {str(e)}")
 
-    # Refresh to get IDs
-    for book in synced_books:
-        db.refresh(book)
+    # An export without a single to-read book is more likely the wrong file
+    # (or the wrong shelf names) than an empty shelf; keep the books we have
+    if not imported:
+        logger.warning(f"Goodreads export {file.filename} has no to-read books; keeping the current shelf")
+    diff = await shelf_sync.finish(remove_missing=imported > 0)
+    # Books now come from the export; make the next RSS sync compare every page
+    await clear_feed_pages(db, user.id)
+    logger.info(f"Imported {diff.total} books from {file.filename}")
 
-    return synced_books
+    return GoodreadsSyncResponse(
+        books_synced=diff.total,
+        added=len(diff.added),
+        updated=len(diff.updated),
+        removed=len(diff.removed),
+        unchanged=diff.unchanged
+    )
 
 
 @router.get("/books", response_model=List[BookWithAvailability])
-async def get_books(db: Session = Depends(get_db)):
+async def get_books(db: AsyncSession = Depends(get_db)):
     """
     Get all synced books with their availability status.
+
+    Availability rows and their libraries are loaded in one extra query
+    for the whole shelf, not per book.
     """
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    books = db.query(Book).filter(Book.user_id == user.id).all()
+    books = (await db.scalars(
+        select(Book).options(
+            selectinload(Book.availability_cache).joinedload(AvailabilityCache.library)
+        ).where(Book.user_id == user.id)
+    )).all()
 
-    result = []
-    for book in books:
-        # Get availability cache for this book
-        availability = []
-        for cache in book.availability_cache:
-            availability.append(AvailabilityResponse(
+    return [book_with_availability(book) for book in books]
+
+
+def book_with_availability(book: Book) -> BookWithAvailability:
+    """Response model for a book with its (already loaded) availability rows."""
+    return BookWithAvailability(
+        id=book.id,
+        goodreads_id=book.goodreads_id,
+        title=book.title,
+        author=book.author,
+        isbn13=book.isbn13,
+        cover_url=book.cover_url,
+        date_added=book.date_added,
+        shelf=book.shelf,
+        availability=[
+            AvailabilityResponse(
                 book_id=cache.book_id,
                 library_id=cache.library_id,
                 library_name=cache.library.name,
@@ -106,18 +172,158 @@ async def get_books(db: Session = Depends(get_db)):
                 search_url=cache.search_url,
                 libby_url=cache.libby_url,
                 checked_at=cache.checked_at
-            ))
-
-        result.append(BookWithAvailability(
-            id=book.id,
-            goodreads_id=book.goodreads_id,
-            title=book.title,
-            author=book.author,
-            isbn13=book.isbn13,
-            cover_url=book.cover_url,
-            date_added=book.date_added,
-            shelf=book.shelf,
-            availability=availability
-        ))
-
-    return result
+            )
+            for cache in book.availability_cache
+        ]
+    )
+
+
+# Sort orders for the paged books API: name -> (column, descending)
+BOOK_SORTS = {
+    "-date_added": (Book.date_added, True),
+    "date_added": (Book.date_added, False),
+    "title": (Book.title, False),
+}
+
+MAX_PAGE_SIZE = 200
+
+# Sorts after any character of a normalized key, closing a prefix range
+PREFIX_UPPER_BOUND = "\uffff"
+
+
+def _encode_cursor(value, book_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, book_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, column) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, book_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if value is not None and column is Book.date_added:
+            value = datetime.fromisoformat(value)
+        return value, int(book_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_cursor(column, descending: bool, value, book_id: int):
+    """
+    Keyset condition for rows after (value, id) in (column, id) order.
+
+    NULL sort values come last in both directions, so they form a tail
+    that is only paged by id.
+    """
+    id_after = Book.id < book_id if descending else Book.id > book_id
+    if value is None:
+        return and_(column.is_(None), id_after)
+    value_after = column < value if descending else column > value
+    return or_(value_after, and_(column == value, id_after), column.is_(None))
+
+
+def _starts_with(column, prefix: str):
+    """
+    `column` starts with `prefix`, as a range an index can serve.
+
+    SQLite never uses an index for LIKE 'x%' on a BINARY-collated column,
+    and a range also needs no escaping of % and _ in the prefix.
+    """
+    return and_(column >= prefix, column < prefix + PREFIX_UPPER_BOUND)
+
+
+def _filtered_books(
+    user_id: int,
+    status: Optional[str],
+    library_id: Optional[int],
+    q: Optional[str]
+):
+    """Books select with the paged API's filters applied."""
+    query = select(Book).where(Book.user_id == user_id)
+
+    if status or library_id:
+        conditions = [AvailabilityCache.book_id == Book.id]
+        if status:
+            conditions.append(AvailabilityCache.status == status)
+        if library_id:
+            conditions.append(AvailabilityCache.library_id == library_id)
+        query = query.where(exists().where(and_(*conditions)))
+
+    if q and q.strip():
+        # Matched on the normalized keys, so both terms can use their index
+        title_prefix = normalize_title(q)
+        author_prefix = normalize_author(q)
+        prefix_matches = []
+        if title_prefix:
+            prefix_matches.append(_starts_with(Book.title_key, title_prefix))
+        if author_prefix:
+            prefix_matches.append(_starts_with(Book.author_key, author_prefix))
+        if not set(title_prefix.split()) - STOPWORDS:
+            # Only stopwords or punctuation, which title keys leave out ("the" for
+            # "The Hobbit"); these rare searches match the raw title instead
+            prefix_matches.append(_starts_with(func.lower(Book.title), q.strip().lower()))
+        query = query.where(or_(*prefix_matches))
+
+    return query
+
+
+@router.get("/books/page", response_model=BookPage)
+async def get_books_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = "-date_added",
+    status: Optional[str] = None,
+    library_id: Optional[int] = None,
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get one page of books with their availability, using keyset cursors.
+
+    Filters: `status` (e.g. "available" = available at any library, or at
+    `library_id` if given), `library_id`, and `q` (title/author prefix).
+    Sort: `-date_added` (default), `date_added` or `title`, ties broken by id.
+    """
+    if sort not in BOOK_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(BOOK_SORTS)}")
+    column, descending = BOOK_SORTS[sort]
+
+    user = await get_or_create_default_user(db)
+    query = _filtered_books(user.id, status, library_id, q)
+
+    if cursor:
+        value, book_id = _decode_cursor(cursor, column)
+        query = query.where(_after_cursor(column, descending, value, book_id))
+
+    order = column.desc() if descending else column.asc()
+    id_order = Book.id.desc() if descending else Book.id.asc()
+    books = (await db.scalars(
+        query.options(
+            selectinload(Book.availability_cache).joinedload(AvailabilityCache.library)
+        ).order_by(order.nulls_last(), id_order).limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(books) > limit:
+        books = books[:limit]
+        last = books[-1]
+        next_cursor = _encode_cursor(getattr(last, column.key), last.id)
+
+    return BookPage(
+        items=[book_with_availability(book) for book in books],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/books/count", response_model=BookCount)
+async def count_books(
+    status: Optional[str] = None,
+    library_id: Optional[int] = None,
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Count books matching the same filters as /books/page (e.g. status=available)."""
+    user = await get_or_create_default_user(db)
+    query = _filtered_books(user.id, status, library_id, q)
+    return BookCount(count=await db.scalar(query.with_only_columns(func.count(Book.id))))
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from models import get_db, User, Library, LibraryCreate, LibraryUpdate, LibraryResponse
+from services import delete_library_tasks, complete_finished_jobs, job_notifier
 from utils import encrypt_value, decrypt_value
 
 router = APIRouter(prefix="/api/libraries", tags=["libraries"])
@@ -11,35 +13,35 @@ router = APIRouter(prefix="/api/libraries", tags=["libraries"])
 DEFAULT_USER_ID = 1
 
 
-def get_or_create_default_user(db: Session) -> User:
+async def get_or_create_default_user(db: AsyncSession) -> User:
     """Get or create the default user for MVP."""
-    user = db.query(User).filter(User.id == DEFAULT_USER_ID).first()
+    user = await db.get(User, DEFAULT_USER_ID)
     if not user:
         user = User(id=DEFAULT_USER_ID, email="default@local")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
 
 
 @router.get("", response_model=List[LibraryResponse])
-async def get_libraries(db: Session = Depends(get_db)):
+async def get_libraries(db: AsyncSession = Depends(get_db)):
     """Get all configured libraries."""
-    user = get_or_create_default_user(db)
-    libraries = db.query(Library).filter(Library.user_id == user.id).all()
+    user = await get_or_create_default_user(db)
+    libraries = (await db.scalars(select(Library).where(Library.user_id == user.id))).all()
     return libraries
 
 
 @router.post("", response_model=LibraryResponse)
-async def add_library(library: LibraryCreate, db: Session = Depends(get_db)):
+async def add_library(library: LibraryCreate, db: AsyncSession = Depends(get_db)):
     """Add a new library configuration."""
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
     # Check for duplicate
-    existing = db.query(Library).filter(
+    existing = await db.scalar(select(Library).where(
         Library.user_id == user.id,
         Library.base_url == library.base_url
-    ).first()
+    ))
 
     if existing:
         raise HTTPException(status_code=400, detail="Library with this URL already exists")
@@ -58,21 +60,21 @@ async def add_library(library: LibraryCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_library)
-    db.commit()
-    db.refresh(db_library)
+    await db.commit()
+    await db.refresh(db_library)
 
     return db_library
 
 
 @router.put("/{library_id}", response_model=LibraryResponse)
-async def update_library(library_id: int, library: LibraryUpdate, db: Session = Depends(get_db)):
+async def update_library(library_id: int, library: LibraryUpdate, db: AsyncSession = Depends(get_db)):
     """Update a library configuration."""
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    db_library = db.query(Library).filter(
+    db_library = await db.scalar(select(Library).where(
         Library.id == library_id,
         Library.user_id == user.id
-    ).first()
+    ))
 
     if not db_library:
         raise HTTPException(status_code=404, detail="Library not found")
@@ -88,26 +90,30 @@ async def update_library(library_id: int, library: LibraryUpdate, db: Session =
     if library.is_active is not None:
         db_library.is_active = library.is_active
 
-    db.commit()
-    db.refresh(db_library)
+    await db.commit()
+    await db.refresh(db_library)
 
     return db_library
 
 
 @router.delete("/{library_id}")
-async def delete_library(library_id: int, db: Session = Depends(get_db)):
+async def delete_library(library_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a library configuration."""
-    user = get_or_create_default_user(db)
+    user = await get_or_create_default_user(db)
 
-    db_library = db.query(Library).filter(
+    db_library = await db.scalar(select(Library).where(
         Library.id == library_id,
         Library.user_id == user.id
-    ).first()
+    ))
 
     if not db_library:
         raise HTTPException(status_code=404, detail="Library not found")
 
-    db.delete(db_library)
-    db.commit()
+    # Queued checks of the library reference it; jobs left with nothing else to run complete
+    job_ids = await delete_library_tasks(db, db_library.id)
+    await db.delete(db_library)
+    await db.commit()
+    for job_id in await complete_finished_jobs(db, job_ids):
+        job_notifier.notify(job_id)
 
     return {"message": "Library deleted"}
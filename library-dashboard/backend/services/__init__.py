@@ -1,22 +1,113 @@
-from .goodreads_parser import fetch_goodreads_rss, validate_rss_url, normalize_goodreads_input, GoodreadsBook
+from .goodreads_parser import (
+    fetch_goodreads_rss, iter_goodreads_pages, validate_rss_url, normalize_goodreads_input,
+    GoodreadsBook, FeedPage
+)
 from .overdrive_scraper import (
     check_availability,
     build_search_url,
+    build_search_urls,
+    build_title_url,
+    availability_flights,
     AvailabilityResult,
     AvailabilityStatus,
     login_to_library,
     perform_checkout
 )
+from .browser_pool import BrowserPool, browser_pool
+from .check_scheduler import CheckScheduler, library_host
+from .single_flight import SingleFlight, FlightStats
+from .resource_blocker import (
+    ResourcePolicy, ResourceStats, install_resource_blocking,
+    AVAILABILITY_POLICY, CHECKOUT_POLICY
+)
+from .page_readiness import wait_for_any, wait_for_search_results
+from .title_resolution import (
+    get_resolution, load_resolutions, is_resolution_fresh, usable_media_id, record_resolution
+)
+from .title_matcher import (
+    MatchKey, match_key, book_match_key, normalize_title, normalize_author, similarity, STOPWORDS
+)
+from .book_sync import ShelfSync, SyncDiff
+from .feed_cache import load_feed_pages, save_feed_pages, clear_feed_pages
+from .goodreads_csv import iter_export_chunks, EXPORT_FIELDS
+from .availability_cache import (
+    is_cache_fresh, availability_values, upsert_availability_results,
+    ResultWriter, FlushStats, result_writer, CACHE_DURATION_HOURS
+)
+from .check_queue import (
+    enqueue_check_all, get_job, job_eta_seconds, claim_tasks, finish_task, complete_finished_jobs,
+    delete_library_tasks
+)
+from .check_worker import CheckWorker
+from .job_events import JobNotifier, job_notifier
+from .overdrive_http import fetch_availability, parse_search_page, close_http_client
 
 __all__ = [
     "fetch_goodreads_rss",
+    "iter_goodreads_pages",
     "validate_rss_url",
     "normalize_goodreads_input",
     "GoodreadsBook",
+    "FeedPage",
     "check_availability",
     "build_search_url",
+    "build_search_urls",
+    "build_title_url",
+    "availability_flights",
     "AvailabilityResult",
     "AvailabilityStatus",
     "login_to_library",
-    "perform_checkout"
+    "perform_checkout",
+    "BrowserPool",
+    "browser_pool",
+    "CheckScheduler",
+    "library_host",
+    "SingleFlight",
+    "FlightStats",
+    "fetch_availability",
+    "parse_search_page",
+    "close_http_client",
+    "ResourcePolicy",
+    "ResourceStats",
+    "install_resource_blocking",
+    "AVAILABILITY_POLICY",
+    "CHECKOUT_POLICY",
+    "wait_for_any",
+    "wait_for_search_results",
+    "get_resolution",
+    "load_resolutions",
+    "is_resolution_fresh",
+    "usable_media_id",
+    "record_resolution",
+    "MatchKey",
+    "match_key",
+    "book_match_key",
+    "normalize_title",
+    "normalize_author",
+    "similarity",
+    "STOPWORDS",
+    "ShelfSync",
+    "SyncDiff",
+    "load_feed_pages",
+    "save_feed_pages",
+    "clear_feed_pages",
+    "iter_export_chunks",
+    "EXPORT_FIELDS",
+    "is_cache_fresh",
+    "availability_values",
+    "upsert_availability_results",
+    "ResultWriter",
+    "FlushStats",
+    "result_writer",
+    "CACHE_DURATION_HOURS",
+    "enqueue_check_all",
+    "get_job",
+    "job_eta_seconds",
+    "claim_tasks",
+    "finish_task",
+    "complete_finished_jobs",
+    "delete_library_tasks",
+    "CheckWorker",
+    "JobNotifier",
+    "job_notifier"
 ]
@@ -0,0 +1,205 @@
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from models import SessionLocal, AvailabilityCache
+from .availability_result import AvailabilityResult, AvailabilityStatus
+
+logger = logging.getLogger(__name__)
+
+# Cache duration in hours
+CACHE_DURATION_HOURS = int(os.getenv("CACHE_DURATION_HOURS", "4"))
+
+# Results written per flush of the write-behind buffer, at most
+RESULT_FLUSH_ROWS = int(os.getenv("RESULT_FLUSH_ROWS", "50"))
+
+# How long a result may wait in the buffer for others to batch with
+RESULT_FLUSH_MS = int(os.getenv("RESULT_FLUSH_MS", "200"))
+
+# Dialect-specific inserts that support ON CONFLICT upserts
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def is_cache_fresh(cache: AvailabilityCache) -> bool:
+    """Whether a cached result can be served without re-checking."""
+    return bool(cache and cache.expires_at and cache.expires_at > datetime.utcnow())
+
+
+def availability_values(
+    book_id: int,
+    library_id: int,
+    result: AvailabilityResult,
+    checked_at: Optional[datetime] = None
+) -> dict:
+    """Column values of the cache row for a check result."""
+    checked_at = checked_at or datetime.utcnow()
+    return {
+        "book_id": book_id,
+        "library_id": library_id,
+        "status": result.status.value,
+        "search_url": result.search_url,
+        "libby_url": result.libby_url,
+        "checked_at": checked_at,
+        "expires_at": checked_at + timedelta(hours=CACHE_DURATION_HOURS),
+        "consecutive_failures": 1 if result.status == AvailabilityStatus.ERROR else 0,
+    }
+
+
+async def upsert_availability_results(db: AsyncSession, rows: List[dict]):
+    """
+    Write cache rows (from availability_values) in one batched statement (does not commit).
+
+    INSERT ... ON CONFLICT DO UPDATE on the (book_id, library_id) unique
+    index, so concurrent checks of the same pair can't add a second row
+    and no lookup is needed first. If a pair appears more than once, the
+    last row wins.
+    """
+    rows = list({(row["book_id"], row["library_id"]): row for row in rows}.values())
+    if not rows:
+        return
+
+    table = AvailabilityCache.__table__
+    statement = UPSERT_INSERTS[db.bind.dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.book_id, table.c.library_id],
+        set_={
+            "status": statement.excluded.status,
+            "search_url": statement.excluded.search_url,
+            "libby_url": statement.excluded.libby_url,
+            "checked_at": statement.excluded.checked_at,
+            "expires_at": statement.excluded.expires_at,
+            "consecutive_failures": case(
+                (statement.excluded.status == AvailabilityStatus.ERROR.value, table.c.consecutive_failures + 1),
+                else_=0
+            ),
+        }
+    )
+    await db.execute(statement, rows)
+
+
+@dataclass
+class FlushStats:
+    """Batch sizes and latency of the result writer's flushes."""
+    flushes: int = 0
+    rows: int = 0
+    last_batch: int = 0
+    last_ms: float = 0.0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_batch(self) -> float:
+        return self.rows / self.flushes if self.flushes else 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.flushes if self.flushes else 0.0
+
+    def record(self, rows: int, elapsed_ms: float):
+        self.flushes += 1
+        self.rows += rows
+        self.last_batch = rows
+        self.last_ms = elapsed_ms
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} results in {self.flushes} flushes "
+            f"(avg batch {self.avg_batch:.1f}, avg {self.avg_ms:.1f} ms, max {self.max_ms:.1f} ms)"
+        )
+
+
+class ResultWriter:
+    """
+    Write-behind buffer for availability results.
+
+    Results from concurrent checks are collected and written together in
+    one batched upsert and one commit - as soon as `batch_size` results are
+    waiting, or `flush_ms` after the first one arrived. add() queues a
+    result without waiting and returns a future for its commit.
+    Flushes run one at a time, in the order their batches were taken.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = RESULT_FLUSH_ROWS,
+        flush_ms: int = RESULT_FLUSH_MS,
+        session_factory: Callable[[], AsyncSession] = SessionLocal
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_ms = flush_ms
+        self.session_factory = session_factory
+        self.stats = FlushStats()
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing = asyncio.Lock()
+        self._flushes: Set[asyncio.Task] = set()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, book_id: int, library_id: int, result: AvailabilityResult) -> asyncio.Future:
+        """Queue a check result; the returned future resolves once it is committed."""
+        loop = asyncio.get_running_loop()
+        written = loop.create_future()
+        self._pending.append((availability_values(book_id, library_id, result), written))
+
+        if len(self._pending) >= self.batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_ms / 1000, self._start_flush)
+        return written
+
+    def _start_flush(self):
+        flush = asyncio.ensure_future(self.flush())
+        # Keep a reference until it finishes; failures are logged and set on the futures
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        """Write every queued result now, in one transaction, after any flush already running."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+
+        async with self._flushing:
+            if batch:
+                await self._write(batch)
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]):
+        start = time.perf_counter()
+        async with self.session_factory() as db:
+            try:
+                await upsert_availability_results(db, [values for values, _ in batch])
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Failed to write {len(batch)} availability results: {e}")
+                for _, written in batch:
+                    if not written.done():
+                        written.set_exception(e)
+                        # Nobody may be waiting on an add()ed result; the error is logged above
+                        written.exception()
+                return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats.record(len(batch), elapsed_ms)
+        logger.debug(f"Flushed {len(batch)} availability results in {elapsed_ms:.1f} ms")
+        for _, written in batch:
+            if not written.done():
+                written.set_result(None)
+
+
+result_writer = ResultWriter()
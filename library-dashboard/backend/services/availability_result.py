@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import Optional
+from enum import Enum
+
+
+class AvailabilityStatus(str, Enum):
+    AVAILABLE = "available"
+    HOLD = "hold"
+    UNAVAILABLE = "unavailable"
+    NOT_FOUND = "not_found"
+    UNKNOWN = "unknown"
+    ERROR = "error"
+
+
+@dataclass
+class AvailabilityResult:
+    status: AvailabilityStatus
+    search_url: str
+    libby_url: Optional[str] = None  # share.libbyapp.com link
+    wait_time: Optional[str] = None  # e.g., "2 weeks"
+    copies_available: Optional[int] = None
+    message: Optional[str] = None
+    ready_ms: Optional[float] = None  # time spent waiting for the page to render
+    media_id: Optional[str] = None  # OverDrive media ID of the matched title
+    match_score: Optional[float] = None  # 0-1 similarity of the matched title to the book
+    resolved_by: Optional[str] = None  # id, isbn, asin or title
+
+
+@dataclass
+class TitleCard:
+    """One title on an OverDrive search results page."""
+    media_id: Optional[str]
+    title: Optional[str]
+    author: Optional[str] = None
+    format: Optional[str] = None  # ebook, audiobook, magazine, ...
+    copies_owned: Optional[int] = None
+    copies_available: Optional[int] = None
+    holds_count: Optional[int] = None
+    is_available: bool = False
+    is_holdable: bool = False
+    wait_days: Optional[int] = None
@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Book, AvailabilityCache, TitleResolution, CheckTask
+from .goodreads_parser import GoodreadsBook, book_feed_key
+from .title_matcher import normalize_title, normalize_author
+
+logger = logging.getLogger(__name__)
+
+# Book columns a sync writes; a book whose values all match is left untouched
+SYNCED_FIELDS = ("goodreads_id", "title", "author", "isbn13", "title_key", "author_key",
+                 "cover_url", "date_added", "shelf")
+
+# Changes to these mean the stored OverDrive media IDs may point at the wrong title
+IDENTITY_FIELDS = ("title_key", "author_key", "isbn13")
+
+
+@dataclass
+class SyncDiff:
+    """What a sync changed on the user's shelf."""
+    added: List[int] = field(default_factory=list)
+    updated: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.added) + len(self.updated) + self.unchanged
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Feed dates carry an offset; the DateTime columns store wall time without one."""
+    return value.replace(tzinfo=None) if value and value.tzinfo else value
+
+
+def book_values(parsed: GoodreadsBook) -> dict:
+    """Column values for a parsed feed entry."""
+    return {
+        "goodreads_id": parsed.goodreads_id or None,
+        "title": parsed.title,
+        "author": parsed.author,
+        "isbn13": parsed.isbn13 or None,
+        "title_key": normalize_title(parsed.title),
+        "author_key": normalize_author(parsed.author),
+        "cover_url": parsed.cover_url,
+        "date_added": _naive(parsed.date_added),
+        "shelf": parsed.shelf,
+    }
+
+
+def _identity_keys(values: dict) -> List[Tuple[str, str]]:
+    """Keys a book is matched on, strongest first: goodreads_id, ISBN, title/author."""
+    keys = []
+    if values["goodreads_id"]:
+        keys.append(("goodreads_id", values["goodreads_id"]))
+    if values["isbn13"]:
+        keys.append(("isbn13", values["isbn13"]))
+    if values["title_key"]:
+        keys.append(("title", f"{values['title_key']}|{values['author_key']}"))
+    return keys
+
+
+class ShelfSync:
+    """
+    Incremental sync of one user's books, applied a batch of feed entries at a time.
+
+    Feed entries are matched to stored books on goodreads_id, then ISBN,
+    then normalized title/author. Matched books keep their id, so their
+    availability cache and resolved media IDs survive the sync. Each
+    batch bulk-inserts new books and bulk-updates changed ones, and books
+    on feed pages that have not changed since the last sync are only
+    marked as kept; finish() then deletes books that were in none of the
+    batches, along with their cache and resolutions. Only call finish()
+    once the whole feed is in.
+
+    Create with `await ShelfSync.start(db, user_id)`, which loads the
+    user's stored books.
+    """
+
+    def __init__(self, db: AsyncSession, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.diff = SyncDiff()
+        self._seen = set()
+        self._pending = set()
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._by_feed_key: Dict[str, int] = {}
+        self._stored: Dict[int, dict] = {}
+
+    @classmethod
+    async def start(cls, db: AsyncSession, user_id: int) -> "ShelfSync":
+        shelf_sync = cls(db, user_id)
+        await shelf_sync._load()
+        return shelf_sync
+
+    async def _load(self):
+        columns = [getattr(Book, name) for name in SYNCED_FIELDS]
+        existing = (await self.db.execute(select(Book.id, *columns).where(Book.user_id == self.user_id))).all()
+        for row in existing:
+            values = dict(zip(SYNCED_FIELDS, row[1:]))
+            self._stored[row.id] = values
+            for key in _identity_keys(values):
+                self._index.setdefault(key, row.id)
+            feed_key = book_feed_key(values["goodreads_id"], values["title"], values["author"])
+            self._by_feed_key.setdefault(feed_key, row.id)
+
+    def keep(self, feed_keys: Iterable[str]):
+        """Mark books from a feed page that has not changed as still on the shelf (no writes)."""
+        for feed_key in feed_keys:
+            book_id = self._by_feed_key.get(feed_key)
+            if book_id is not None and book_id not in self._seen:
+                self._seen.add(book_id)
+                self.diff.unchanged += 1
+
+    async def apply(self, parsed_books: Iterable[GoodreadsBook], fields: Sequence[str] = SYNCED_FIELDS):
+        """
+        Insert/update one batch of feed entries (commits).
+
+        `fields` are the columns this source provides; other columns of
+        books that already exist are left as they are.
+        """
+        inserts, updates, reidentified = [], [], []
+        for parsed in parsed_books:
+            values = book_values(parsed)
+            keys = _identity_keys(values)
+            book_id = next((self._index[key] for key in keys if key in self._index), None)
+
+            if book_id in self._seen or (book_id is None and self._pending.intersection(keys)):
+                continue  # duplicate feed entry
+            if book_id is None:
+                inserts.append({"user_id": self.user_id, **values})
+                self._pending.update(keys)
+                continue
+            self._seen.add(book_id)
+
+            old = self._stored[book_id]
+            if all(old[name] == values[name] for name in fields):
+                self.diff.unchanged += 1
+                continue
+            updates.append({"id": book_id, **{name: values[name] for name in fields}})
+            self.diff.updated.append(book_id)
+            if any(old[name] != values[name] for name in IDENTITY_FIELDS if name in fields):
+                reidentified.append(book_id)
+
+        if reidentified:
+            await self.db.execute(delete(TitleResolution).where(TitleResolution.book_id.in_(reidentified)))
+        if updates:
+            await self.db.execute(update(Book), updates)
+        if inserts:
+            self.diff.added.extend(await self.db.scalars(insert(Book).returning(Book.id), inserts))
+        await self.db.commit()
+
+    async def finish(self, remove_missing: bool = True) -> SyncDiff:
+        """
+        Delete books that were not in the feed (commits) and return the diff.
+
+        With `remove_missing` False, books not in the feed are kept.
+        """
+        if remove_missing:
+            self.diff.removed = [book_id for book_id in self._stored if book_id not in self._seen]
+        if self.diff.removed:
+            removed = self.diff.removed
+            await self.db.execute(delete(AvailabilityCache).where(AvailabilityCache.book_id.in_(removed)))
+            await self.db.execute(delete(TitleResolution).where(TitleResolution.book_id.in_(removed)))
+            await self.db.execute(delete(CheckTask).where(CheckTask.book_id.in_(removed)))
+            await self.db.execute(delete(Book).where(Book.id.in_(removed)))
+            await self.db.commit()
+
+        logger.info(
+            f"Sync for user {self.user_id}: {len(self.diff.added)} added, "
+            f"{len(self.diff.updated)} updated, {len(self.diff.removed)} removed, "
+            f"{self.diff.unchanged} unchanged"
+        )
+        return self.diff
+
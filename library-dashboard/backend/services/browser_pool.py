@@ -0,0 +1,146 @@
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Max pages open at once across the whole process
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+
+# Relaunch Chromium after this many pages to keep memory in check
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+
+
+class BrowserPool:
+    """
+    Process-wide pool around a single long-lived Chromium instance.
+
+    Each caller gets its own isolated BrowserContext (cookies, storage) and
+    page, so checks never share session state. The browser is relaunched
+    after `max_pages` pages or when it disconnects (crash); a retired browser
+    is only closed once every context still using it has been released.
+    """
+
+    def __init__(self, max_concurrency: int = BROWSER_POOL_SIZE,
+                 max_pages: int = BROWSER_MAX_PAGES, headless: bool = True):
+        self.max_concurrency = max_concurrency
+        self.max_pages = max_pages
+        self.headless = headless
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._pages_served = 0
+        self._in_use: dict[Browser, int] = {}
+        self._lock = asyncio.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Start Playwright and launch the first browser."""
+        async with self._lock:
+            if self._playwright is not None:
+                return
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._playwright = await async_playwright().start()
+            await self._launch()
+
+    async def stop(self):
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            browsers = list(self._in_use)
+            if self._browser and self._browser not in self._in_use:
+                browsers.append(self._browser)
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._browser = None
+            self._in_use.clear()
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self):
+        """Launch a fresh browser. Caller must hold the lock."""
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._pages_served = 0
+        logger.info("Launched pooled Chromium browser")
+
+    async def _close_browser(self, browser: Browser):
+        try:
+            await browser.close()
+        except Exception:
+            # Already gone (crashed or closed elsewhere)
+            pass
+
+    async def _acquire_browser(self) -> Browser:
+        """Return the current browser, relaunching it if it is spent or dead."""
+        async with self._lock:
+            browser = self._browser
+            if browser is None or not browser.is_connected() or self._pages_served >= self.max_pages:
+                if browser is not None and not self._in_use.get(browser):
+                    await self._close_browser(browser)
+                await self._launch()
+                browser = self._browser
+
+            self._pages_served += 1
+            self._in_use[browser] = self._in_use.get(browser, 0) + 1
+            return browser
+
+    async def _release_browser(self, browser: Browser):
+        async with self._lock:
+            remaining = self._in_use.get(browser, 0) - 1
+            if remaining > 0:
+                self._in_use[browser] = remaining
+                return
+            self._in_use.pop(browser, None)
+            # Retired browser with no more users - safe to close now
+            if browser is not self._browser:
+                await self._close_browser(browser)
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """
+        Yield an isolated BrowserContext from the pooled browser.
+
+        Blocks while `max_concurrency` contexts are already open.
+        """
+        if not self.started:
+            await self.start()
+
+        async with self._semaphore:
+            browser = await self._acquire_browser()
+            try:
+                try:
+                    context = await browser.new_context(**context_options)
+                except Exception:
+                    if browser.is_connected():
+                        raise
+                    # Browser crashed between checks - retry once on a fresh one
+                    await self._release_browser(browser)
+                    browser = await self._acquire_browser()
+                    context = await browser.new_context(**context_options)
+
+                try:
+                    yield context
+                finally:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+            finally:
+                await self._release_browser(browser)
+
+    @asynccontextmanager
+    async def page(self, **context_options) -> AsyncIterator[Page]:
+        """Yield a new page in its own isolated context."""
+        async with self.context(**context_options) as context:
+            yield await context.new_page()
+
+
+# Shared pool, started and stopped by the FastAPI lifespan
+browser_pool = BrowserPool()
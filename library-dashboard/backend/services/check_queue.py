@@ -0,0 +1,248 @@
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+import logging
+import os
+import uuid
+
+from models import Book, Library, AvailabilityCache, CheckJob, CheckTask
+
+logger = logging.getLogger(__name__)
+
+# A claimed task whose worker has not finished it within this long is handed out again
+TASK_LEASE_SECONDS = int(os.getenv("CHECK_TASK_LEASE_SECONDS", "300"))
+
+# Claims per task before it is given up on (crashes and retried exceptions both count)
+MAX_TASK_ATTEMPTS = int(os.getenv("CHECK_TASK_MAX_ATTEMPTS", "3"))
+
+UNFINISHED_TASK_STATUSES = ("pending", "claimed")
+
+
+def check_all_key(user_id: int) -> str:
+    """Dedupe key of a user's "check all books" job."""
+    return f"check-all:{user_id}"
+
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[CheckJob]:
+    return await db.get(CheckJob, job_id)
+
+
+def job_eta_seconds(job: CheckJob) -> Optional[float]:
+    """Time left for a running job, extrapolated from its rate so far."""
+    if job.status != "running" or not job.started_at or not job.done:
+        return None
+    elapsed = (datetime.utcnow() - job.started_at).total_seconds()
+    return round(elapsed / job.done * max(job.total - job.done, 0), 1)
+
+
+async def stale_pairs(db: AsyncSession, user_id: int) -> List[Tuple[int, int]]:
+    """(book_id, library_id) for every active library where the book's cache is missing or expired."""
+    now = datetime.utcnow()
+    rows = (await db.execute(
+        select(Book.id, Library.id)
+        .select_from(Book)
+        .join(Library, and_(Library.user_id == Book.user_id, Library.is_active == True))
+        .outerjoin(AvailabilityCache, and_(
+            AvailabilityCache.book_id == Book.id,
+            AvailabilityCache.library_id == Library.id
+        ))
+        .where(
+            Book.user_id == user_id,
+            or_(AvailabilityCache.expires_at.is_(None), AvailabilityCache.expires_at <= now)
+        )
+        # Consecutive tasks alternate libraries, so every claimed batch spreads across hosts
+        .order_by(Book.id, Library.id)
+    )).all()
+    return [(book_id, library_id) for book_id, library_id in rows]
+
+
+async def enqueue_check_all(db: AsyncSession, user_id: int) -> Tuple[CheckJob, bool]:
+    """
+    Queue a check of every stale book x library pair for the user (commits).
+
+    Returns (job, created). If the user already has a check-all job queued
+    or running - started from this process or any other - that job is
+    returned instead of starting a second one.
+    """
+    key = check_all_key(user_id)
+    existing = await db.scalar(select(CheckJob).where(CheckJob.active_key == key))
+    if existing:
+        return existing, False
+
+    pairs = await stale_pairs(db, user_id)
+    now = datetime.utcnow()
+    job = CheckJob(id=str(uuid.uuid4()), user_id=user_id, total=len(pairs), created_at=now)
+    if pairs:
+        job.status = "queued"
+        job.active_key = key
+    else:
+        job.status = "completed"
+        job.finished_at = now
+    db.add(job)
+
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Another request queued the same job between our lookup and insert
+        await db.rollback()
+        existing = await db.scalar(select(CheckJob).where(CheckJob.active_key == key))
+        if existing:
+            return existing, False
+        raise
+
+    if pairs:
+        await db.execute(insert(CheckTask), [
+            {"job_id": job.id, "book_id": book_id, "library_id": library_id, "status": "pending"}
+            for book_id, library_id in pairs
+        ])
+    await db.commit()
+    logger.info(f"Queued job {job.id}: {len(pairs)} checks for user {user_id}")
+    return job, True
+
+
+def _claimable(now: datetime):
+    lease_expired = now - timedelta(seconds=TASK_LEASE_SECONDS)
+    return and_(
+        CheckTask.attempts < MAX_TASK_ATTEMPTS,
+        or_(
+            CheckTask.status == "pending",
+            and_(CheckTask.status == "claimed", CheckTask.claimed_at < lease_expired)
+        )
+    )
+
+
+def _abandoned(now: datetime):
+    """Claimed tasks whose lease ran out on their last allowed attempt."""
+    lease_expired = now - timedelta(seconds=TASK_LEASE_SECONDS)
+    return and_(
+        CheckTask.attempts >= MAX_TASK_ATTEMPTS,
+        CheckTask.status == "claimed",
+        CheckTask.claimed_at < lease_expired
+    )
+
+
+async def _count_finished(db: AsyncSession, job_ids: Iterable[str], failed: bool):
+    for job_id in job_ids:
+        values = {"done": CheckJob.done + 1}
+        if failed:
+            values["failed"] = CheckJob.failed + 1
+        await db.execute(update(CheckJob).where(CheckJob.id == job_id).values(**values))
+
+
+async def claim_tasks(db: AsyncSession, worker_id: str, limit: int) -> List[CheckTask]:
+    """
+    Atomically claim up to `limit` tasks for this worker (commits).
+
+    Pending tasks are claimed in queue order, along with tasks whose
+    lease expired because their worker died. The claim is one UPDATE, so
+    concurrent workers - in this process or others - never get the same
+    task (Postgres additionally skips rows locked by another claim).
+    """
+    now = datetime.utcnow()
+
+    abandoned = (await db.scalars(
+        update(CheckTask).where(_abandoned(now)).values(status="error")
+        .returning(CheckTask.job_id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await _count_finished(db, abandoned, failed=True)
+
+    candidates = (
+        select(CheckTask.id).where(_claimable(now)).order_by(CheckTask.id).limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    claimed_ids = (await db.scalars(
+        update(CheckTask)
+        .where(CheckTask.id.in_(candidates), _claimable(now))
+        .values(status="claimed", claimed_by=worker_id, claimed_at=now, attempts=CheckTask.attempts + 1)
+        .returning(CheckTask.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+
+    tasks = (await db.scalars(
+        select(CheckTask).where(CheckTask.id.in_(claimed_ids)).order_by(CheckTask.id)
+    )).all()
+    job_ids = {task.job_id for task in tasks}
+    if job_ids:
+        await db.execute(
+            update(CheckJob)
+            .where(CheckJob.id.in_(job_ids), CheckJob.status == "queued")
+            .values(status="running", started_at=now)
+        )
+    await db.commit()
+    if abandoned:
+        await complete_finished_jobs(db, set(abandoned))
+    return tasks
+
+
+async def _release(db: AsyncSession, task: CheckTask, worker_id: str, status: str) -> bool:
+    """Move a task this worker still holds to `status`; False if its lease was lost."""
+    result = await db.execute(
+        update(CheckTask)
+        .where(CheckTask.id == task.id, CheckTask.claimed_by == worker_id, CheckTask.status == "claimed")
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def finish_task(db: AsyncSession, task: CheckTask, worker_id: str, failed: bool = False):
+    """Record a task as done (commits). Ignored if another worker has since taken it over."""
+    if await _release(db, task, worker_id, "error" if failed else "done"):
+        await _count_finished(db, [task.job_id], failed)
+    await db.commit()
+
+
+async def retry_task(db: AsyncSession, task: CheckTask, worker_id: str):
+    """Hand a task that raised back to the queue, or fail it after its last attempt (commits)."""
+    if task.attempts < MAX_TASK_ATTEMPTS:
+        await _release(db, task, worker_id, "pending")
+        await db.commit()
+    else:
+        await finish_task(db, task, worker_id, failed=True)
+
+
+async def delete_library_tasks(db: AsyncSession, library_id: int) -> List[str]:
+    """
+    Delete a library's tasks ahead of the library itself (no commit).
+
+    Jobs no longer count the unfinished ones among their total. Returns
+    the affected job ids, to complete once the deletion is committed.
+    """
+    unfinished = (await db.execute(
+        select(CheckTask.job_id, func.count(CheckTask.id))
+        .where(CheckTask.library_id == library_id, CheckTask.status.in_(UNFINISHED_TASK_STATUSES))
+        .group_by(CheckTask.job_id)
+    )).all()
+    for job_id, count in unfinished:
+        await db.execute(update(CheckJob).where(CheckJob.id == job_id).values(total=CheckJob.total - count))
+    await db.execute(delete(CheckTask).where(CheckTask.library_id == library_id))
+    return [job_id for job_id, _ in unfinished]
+
+
+async def complete_finished_jobs(db: AsyncSession, job_ids: Iterable[str]) -> List[str]:
+    """Mark jobs with no unfinished tasks completed and drop their tasks (commits)."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return []
+    unfinished = (
+        select(CheckTask.id)
+        .where(CheckTask.job_id == CheckJob.id, CheckTask.status.in_(UNFINISHED_TASK_STATUSES))
+        .exists()
+    )
+    completed = (await db.scalars(
+        update(CheckJob)
+        .where(CheckJob.id.in_(job_ids), CheckJob.active_key.isnot(None), ~unfinished)
+        .values(status="completed", active_key=None, finished_at=datetime.utcnow())
+        .returning(CheckJob.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if completed:
+        await db.execute(delete(CheckTask).where(CheckTask.job_id.in_(completed)))
+    await db.commit()
+    for job_id in completed:
+        logger.info(f"Job {job_id} completed")
+    return completed
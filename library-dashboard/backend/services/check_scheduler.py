@@ -0,0 +1,93 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Total checks in flight across all libraries
+CHECK_CONCURRENCY = int(os.getenv("CHECK_CONCURRENCY", "8"))
+
+# Checks in flight against any single library host (OverDrive tenant)
+CHECK_PER_HOST_CONCURRENCY = int(os.getenv("CHECK_PER_HOST_CONCURRENCY", "2"))
+
+
+def library_host(base_url: str) -> str:
+    """Group key for a library - the OverDrive tenant hostname."""
+    return urlparse(base_url).netloc.lower() or base_url
+
+
+class CheckScheduler:
+    """
+    Bounded-concurrency fan-out for availability checks.
+
+    Items are grouped by key (library host) and dispatched round-robin across
+    groups, so one large library never starves the others. At most
+    `max_concurrency` items run at once overall and at most
+    `per_key_concurrency` at once for any single key.
+    """
+
+    def __init__(self, max_concurrency: int = CHECK_CONCURRENCY,
+                 per_key_concurrency: int = CHECK_PER_HOST_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_key_concurrency = max(1, per_key_concurrency)
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        key: Callable[[Any], Hashable],
+        worker: Callable[[Any], Awaitable[None]],
+    ) -> int:
+        """
+        Run `worker` over every item and wait for all of them.
+
+        Worker exceptions are logged and do not stop the run.
+        Returns the number of items processed.
+        """
+        queues: Dict[Hashable, deque] = {}
+        for item in items:
+            queues.setdefault(key(item), deque()).append(item)
+
+        total = sum(len(q) for q in queues.values())
+        if not total:
+            return 0
+
+        keys: List[Hashable] = list(queues)
+        active: Dict[Hashable, int] = defaultdict(int)
+        cursor = 0
+        changed = asyncio.Condition()
+
+        async def next_item():
+            nonlocal cursor
+            async with changed:
+                while True:
+                    # Round-robin over keys, skipping exhausted or saturated ones
+                    for offset in range(len(keys)):
+                        k = keys[(cursor + offset) % len(keys)]
+                        if queues[k] and active[k] < self.per_key_concurrency:
+                            cursor = (cursor + offset + 1) % len(keys)
+                            active[k] += 1
+                            return k, queues[k].popleft()
+                    if not any(queues.values()):
+                        return None
+                    await changed.wait()
+
+        async def runner():
+            while True:
+                picked = await next_item()
+                if picked is None:
+                    return
+                k, item = picked
+                try:
+                    await worker(item)
+                except Exception as e:
+                    logger.error(f"Check for {k} failed: {e}")
+                finally:
+                    async with changed:
+                        active[k] -= 1
+                        changed.notify_all()
+
+        await asyncio.gather(*(runner() for _ in range(min(self.max_concurrency, total))))
+        return total
@@ -0,0 +1,145 @@
+from sqlalchemy import select
+from typing import Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from models import SessionLocal, Book, Library, AvailabilityCache
+from .availability_cache import is_cache_fresh, result_writer
+from .availability_result import AvailabilityStatus
+from .check_queue import claim_tasks, finish_task, retry_task, complete_finished_jobs
+from .job_events import job_notifier
+from .check_scheduler import CheckScheduler, CHECK_CONCURRENCY, library_host
+from .overdrive_scraper import check_availability, availability_flights
+from .title_matcher import book_match_key
+from .title_resolution import load_resolutions, usable_media_id, record_resolution
+
+logger = logging.getLogger(__name__)
+
+# Tasks claimed per round; the scheduler runs them with bounded per-host concurrency
+CHECK_WORKER_BATCH_SIZE = int(os.getenv("CHECK_WORKER_BATCH_SIZE", str(CHECK_CONCURRENCY * 2)))
+
+# How long an idle worker waits before looking for new tasks again
+CHECK_WORKER_POLL_SECONDS = float(os.getenv("CHECK_WORKER_POLL_SECONDS", "2"))
+
+
+class CheckWorker:
+    """
+    Runs queued availability checks.
+
+    Each round claims a batch of book x library tasks from the database,
+    runs them through the CheckScheduler, and completes jobs that have
+    nothing left. Any number of workers, in any number of processes, can
+    share the queue; a worker that dies leaves its claims to expire and
+    be picked up by another.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        batch_size: int = CHECK_WORKER_BATCH_SIZE,
+        poll_interval: float = CHECK_WORKER_POLL_SECONDS
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+
+    async def run(self, stop: asyncio.Event):
+        """Work until `stop` is set, polling while the queue is empty."""
+        logger.info(f"Check worker {self.worker_id} started")
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Check worker {self.worker_id} round failed: {e}")
+                processed = 0
+            if not processed:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info(f"Check worker {self.worker_id} stopped")
+
+    async def run_once(self) -> int:
+        """Claim and run one batch of tasks. Returns how many were claimed."""
+        # Every finished check commits; the session keeps the preloaded rows
+        # readable instead of reloading them (see SessionLocal)
+        async with SessionLocal() as db:
+            tasks = await claim_tasks(db, self.worker_id, self.batch_size)
+            if not tasks:
+                return 0
+
+            book_ids = {task.book_id for task in tasks}
+            library_ids = {task.library_id for task in tasks}
+            books = {book.id: book for book in await db.scalars(select(Book).where(Book.id.in_(book_ids)))}
+            libraries = {
+                library.id: library
+                for library in await db.scalars(select(Library).where(Library.id.in_(library_ids)))
+            }
+            caches = {
+                (cache.book_id, cache.library_id): cache
+                for cache in await db.scalars(
+                    select(AvailabilityCache).where(AvailabilityCache.book_id.in_(book_ids))
+                )
+            }
+            resolutions = await load_resolutions(db, book_ids)
+            # Checks run concurrently but share the session, which can't run two statements at once
+            db_lock = asyncio.Lock()
+            # (task, result, write) for each check whose result is queued on the result writer
+            written = []
+
+            async def check(task):
+                book = books.get(task.book_id)
+                library = libraries.get(task.library_id)
+                key = (task.book_id, task.library_id)
+
+                # Removed since the job was queued, or refreshed by another check meanwhile
+                if not book or not library or not library.is_active or is_cache_fresh(caches.get(key)):
+                    async with db_lock:
+                        await finish_task(db, task, self.worker_id)
+                    job_notifier.notify(task.job_id)
+                    return
+
+                try:
+                    result = await check_availability(
+                        base_url=library.base_url,
+                        title=book.title,
+                        author=book.author,
+                        isbn=book.isbn13,
+                        media_id=usable_media_id(resolutions.get(key)),
+                        wanted=book_match_key(book)
+                    )
+                except Exception:
+                    async with db_lock:
+                        await retry_task(db, task, self.worker_id)
+                    job_notifier.notify(task.job_id)
+                    raise
+                # Written with the next batch, and the task finished once it is. If this
+                # process dies first, the task's claim expires and it runs again.
+                written.append((task, result, result_writer.add(book.id, library.id, result)))
+                async with db_lock:
+                    resolutions[key] = await record_resolution(db, book.id, library.id, resolutions.get(key), result)
+
+            def host(task):
+                library = libraries.get(task.library_id)
+                return library_host(library.base_url) if library else None
+
+            await CheckScheduler().run(tasks, key=host, worker=check)
+            # Results are stored before their tasks are finished, so a job is never
+            # reported completed without them; a task whose write failed is retried
+            await result_writer.flush()
+            for task, result, write in written:
+                if write.exception() is not None:
+                    await retry_task(db, task, self.worker_id)
+                else:
+                    await finish_task(db, task, self.worker_id, failed=result.status == AvailabilityStatus.ERROR)
+                job_notifier.notify(task.job_id)
+            completed = await complete_finished_jobs(db, {task.job_id for task in tasks})
+            for job_id in completed:
+                job_notifier.notify(job_id)
+            if completed:
+                logger.info(f"Availability checks: {availability_flights.stats.summary()}")
+                logger.info(f"Availability results: {result_writer.stats.summary()}")
+            return len(tasks)
@@ -0,0 +1,78 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Dict, Iterable
+import json
+
+from models import FeedPageCache
+from .goodreads_parser import FeedPage
+
+
+async def load_feed_pages(db: AsyncSession, user_id: int) -> Dict[str, FeedPage]:
+    """The user's last fetch of each feed page, keyed by page URL (books not loaded)."""
+    rows = (await db.scalars(select(FeedPageCache).where(FeedPageCache.user_id == user_id))).all()
+    return {
+        row.url: FeedPage(
+            number=0,
+            url=row.url,
+            books=None,
+            book_keys=json.loads(row.book_keys or "[]"),
+            etag=row.etag,
+            last_modified=row.last_modified,
+            content_hash=row.content_hash,
+        )
+        for row in rows
+    }
+
+
+async def save_feed_pages(db: AsyncSession, user_id: int, pages: Iterable[FeedPage]) -> bool:
+    """
+    Store validators for the pages fetched in a sync (commits if anything changed).
+
+    Pages whose validators and hash are unchanged are not rewritten, and
+    cached pages that were not part of this fetch are dropped. Returns
+    whether anything was written.
+    """
+    rows = {
+        row.url: row
+        for row in await db.scalars(select(FeedPageCache).where(FeedPageCache.user_id == user_id))
+    }
+    changed = False
+
+    fetched = set()
+    for page in pages:
+        fetched.add(page.url)
+        row = rows.get(page.url)
+        if row and (row.etag, row.last_modified, row.content_hash) == (
+            page.etag, page.last_modified, page.content_hash
+        ):
+            continue
+        if not row:
+            row = FeedPageCache(user_id=user_id, url=page.url)
+            db.add(row)
+        row.etag = page.etag
+        row.last_modified = page.last_modified
+        row.content_hash = page.content_hash
+        row.book_keys = json.dumps(page.book_keys)
+        row.fetched_at = datetime.utcnow()
+        changed = True
+
+    for url, row in rows.items():
+        if url not in fetched:
+            await db.delete(row)
+            changed = True
+
+    if changed:
+        await db.commit()
+    return changed
+
+
+async def clear_feed_pages(db: AsyncSession, user_id: int):
+    """
+    Forget the user's feed validators (commits), so the next sync re-reads every page.
+
+    Needed after books are written from another source, since unchanged
+    feed pages are trusted to match the stored books.
+    """
+    await db.execute(delete(FeedPageCache).where(FeedPageCache.user_id == user_id))
+    await db.commit()
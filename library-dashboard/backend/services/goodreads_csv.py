@@ -0,0 +1,91 @@
+from typing import BinaryIO, Iterator, List
+import os
+
+import pandas as pd
+
+from .book_sync import SYNCED_FIELDS
+from .goodreads_parser import GoodreadsBook
+
+# Rows parsed (and written) per chunk of a library export
+CSV_CHUNK_ROWS = int(os.getenv("GOODREADS_CSV_CHUNK_ROWS", "2000"))
+
+# Columns read from Goodreads' "Export Library" CSV; the rest are skipped
+EXPORT_COLUMNS = ["Title", "Author", "ISBN", "ISBN13", "Date Added", "Bookshelves", "Exclusive Shelf"]
+
+# Book columns an export updates on books that already exist. It has no
+# cover images, its dates have no time of day, and its "Book Id" is not the
+# review id the RSS feed stores as goodreads_id - so those are left alone.
+EXPORT_FIELDS = tuple(
+    name for name in SYNCED_FIELDS if name not in ("goodreads_id", "cover_url", "date_added")
+)
+
+# An export has all of these, and at least one of the shelf columns
+EXPORT_REQUIRED_COLUMNS = ("Title", "Author")
+EXPORT_SHELF_COLUMNS = ("Bookshelves", "Exclusive Shelf")
+
+TO_READ_SHELF = "to-read"
+
+
+def clean_isbn_column(column: pd.Series) -> pd.Series:
+    """Strip the export's `="9780..."` spreadsheet quoting from a whole ISBN column."""
+    return column.str.replace(r'[="]', '', regex=True).str.strip()
+
+
+def books_from_export(frame: pd.DataFrame) -> List[GoodreadsBook]:
+    """
+    To-read books from one chunk of a library export.
+
+    Shelf filtering and ISBN/date cleanup run as column operations over
+    the chunk; only the final GoodreadsBook objects are built per row.
+    """
+    frame = frame.reindex(columns=EXPORT_COLUMNS, fill_value='')
+    on_shelf = (
+        frame['Bookshelves'].str.contains(TO_READ_SHELF, case=False, regex=False)
+        | frame['Exclusive Shelf'].str.strip().str.lower().eq(TO_READ_SHELF)
+    )
+    frame = frame[on_shelf & frame['Title'].str.strip().ne('')]
+
+    isbn13 = clean_isbn_column(frame['ISBN13'])
+    isbn = isbn13.where(isbn13.ne(''), clean_isbn_column(frame['ISBN']))
+    date_added = pd.to_datetime(frame['Date Added'], format='%Y/%m/%d', errors='coerce')
+
+    return [
+        GoodreadsBook(
+            goodreads_id='',
+            title=title,
+            author=author or None,
+            isbn13=isbn or None,
+            cover_url=None,
+            date_added=None if pd.isna(added) else added.to_pydatetime(),
+            shelf=TO_READ_SHELF,
+        )
+        for title, author, isbn, added in zip(
+            frame['Title'].str.strip(), frame['Author'].str.strip(), isbn, date_added
+        )
+    ]
+
+
+def iter_export_chunks(file: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[List[GoodreadsBook]]:
+    """
+    Parse a Goodreads library export in chunks of `chunk_rows` rows.
+
+    Raises ValueError if the file is not a CSV with the export's Title,
+    Author and shelf columns.
+    """
+    reader = pd.read_csv(
+        file,
+        chunksize=chunk_rows,
+        usecols=lambda column: column in EXPORT_COLUMNS,
+        dtype=str,
+        keep_default_na=False,  # a book titled "NA" is still a title
+        encoding='utf-8',
+        encoding_errors='replace',
+    )
+    with reader:
+        for chunk in reader:
+            missing = [column for column in EXPORT_REQUIRED_COLUMNS if column not in chunk.columns]
+            if not any(column in chunk.columns for column in EXPORT_SHELF_COLUMNS):
+                missing.append(" or ".join(EXPORT_SHELF_COLUMNS))
+            if missing:
+                raise ValueError(f"Not a Goodreads library export (no {', '.join(missing)} column)")
+            yield books_from_export(chunk)
@@ -1,10 +1,37 @@
 import feedparser
 import httpx
 from datetime import datetime
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from xml.etree import ElementTree
+from dataclasses import dataclass, replace
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import asyncio
+import hashlib
+import logging
+import os
 import re
 
+from .overdrive_http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Feed pages requested at once while paging through a shelf
+GOODREADS_FEED_CONCURRENCY = int(os.getenv("GOODREADS_FEED_CONCURRENCY", "4"))
+
+# Upper bound on pages fetched for one shelf (Goodreads serves 100 books per page)
+GOODREADS_MAX_PAGES = int(os.getenv("GOODREADS_MAX_PAGES", "100"))
+
+GOODREADS_FEED_TIMEOUT = 30
+
+MEDIA_CONTENT_TAG = '{http://search.yahoo.com/mrss/}content'
+
+RATING_PREFIX_PATTERN = re.compile(r'^[★☆]+\s*')
+ISBN13_LABEL_PATTERN = re.compile(r'isbn13:\s*(\d{13})', re.IGNORECASE)
+ISBN13_PATTERN = re.compile(r'\b(97[89]\d{10})\b')
+TITLE_BY_AUTHOR_PATTERN = re.compile(r'^(.+?)\s+by\s+(.+)$', re.IGNORECASE)
+REVIEW_ID_PATTERN = re.compile(r'/show/(\d+)')
+DIGITS_PATTERN = re.compile(r'(\d+)')
+
 
 @dataclass
 class GoodreadsBook:
@@ -21,18 +48,18 @@ class GoodreadsBook:
 def clean_title(title: str) -> str:
     """Clean up book title - remove rating prefix if present."""
     # Goodreads RSS sometimes includes "★★★★☆ " rating prefix
-    cleaned = re.sub(r'^[★☆]+\s*', '', title)
+    cleaned = RATING_PREFIX_PATTERN.sub('', title)
     return cleaned.strip()
 
 
 def extract_isbn(description: str) -> Optional[str]:
     """Extract ISBN13 from description if present."""
     # Look for ISBN-13 pattern
-    match = re.search(r'isbn13:\s*(\d{13})', description, re.IGNORECASE)
+    match = ISBN13_LABEL_PATTERN.search(description)
     if match:
         return match.group(1)
     # Also try without label
-    match = re.search(r'\b(97[89]\d{10})\b', description)
+    match = ISBN13_PATTERN.search(description)
     if match:
         return match.group(1)
     return None
@@ -44,7 +71,7 @@ def extract_author_from_title(title_with_author: str) -> tuple[str, Optional[str
     Returns (title, author) tuple.
     """
     # Pattern: "Book Title by Author Name"
-    match = re.match(r'^(.+?)\s+by\s+(.+)$', title_with_author, re.IGNORECASE)
+    match = TITLE_BY_AUTHOR_PATTERN.match(title_with_author)
     if match:
         return match.group(1).strip(), match.group(2).strip()
     return title_with_author, None
@@ -70,24 +97,21 @@ def parse_goodreads_date(date_str: str) -> Optional[datetime]:
         return None
 
 
-async def fetch_goodreads_rss(rss_url: str) -> List[GoodreadsBook]:
+def parse_goodreads_feed(content) -> List[GoodreadsBook]:
     """
-    Fetch and parse Goodreads RSS feed.
+    Parse one page of a Goodreads RSS feed with feedparser.
+
+    Lenient about malformed XML, but builds the whole document first; see
+    GoodreadsFeedParser for the streaming parser used when fetching.
 
     Args:
-        rss_url: Full Goodreads RSS URL with key
+        content: RSS XML (str or bytes)
 
     Returns:
         List of parsed books
     """
     books = []
 
-    # Fetch RSS feed
-    async with httpx.AsyncClient() as client:
-        response = await client.get(rss_url, follow_redirects=True, timeout=30)
-        response.raise_for_status()
-        content = response.text
-
     # Parse feed
     feed = feedparser.parse(content)
 
@@ -96,13 +120,13 @@ async def fetch_goodreads_rss(rss_url: str) -> List[GoodreadsBook]:
         # Format: https://www.goodreads.com/review/show/1234567890
         goodreads_id = None
         if 'link' in entry:
-            match = re.search(r'/show/(\d+)', entry.link)
+            match = REVIEW_ID_PATTERN.search(entry.link)
             if match:
                 goodreads_id = match.group(1)
 
         # Extract book_id from guid if available
         if not goodreads_id and 'id' in entry:
-            match = re.search(r'(\d+)', entry.id)
+            match = DIGITS_PATTERN.search(entry.id)
             if match:
                 goodreads_id = match.group(1)
 
@@ -153,6 +177,291 @@ async def fetch_goodreads_rss(rss_url: str) -> List[GoodreadsBook]:
     return books
 
 
+def book_from_item(item: ElementTree.Element) -> GoodreadsBook:
+    """Build a GoodreadsBook from an RSS <item>, the same way parse_goodreads_feed reads an entry."""
+    fields = {}
+    cover_url = None
+    for child in item:
+        if child.tag == MEDIA_CONTENT_TAG:
+            cover_url = cover_url or child.get('url')
+        elif child.text:
+            fields[child.tag] = child.text.strip()
+
+    # Review URL: https://www.goodreads.com/review/show/1234567890, else digits of the guid
+    goodreads_id = None
+    match = REVIEW_ID_PATTERN.search(fields.get('link', ''))
+    if not match:
+        match = DIGITS_PATTERN.search(fields.get('guid', ''))
+    if match:
+        goodreads_id = match.group(1)
+
+    title = clean_title(fields.get('title', 'Unknown Title'))
+    author = fields.get('author_name')
+    if not author:
+        title, author = extract_author_from_title(title)
+
+    isbn13 = extract_isbn(fields.get('description', ''))
+    if not isbn13:
+        isbn13 = fields.get('isbn13') or fields.get('isbn')
+
+    return GoodreadsBook(
+        goodreads_id=goodreads_id or '',
+        title=title,
+        author=author,
+        isbn13=isbn13,
+        cover_url=fields.get('book_image_url') or cover_url,
+        date_added=parse_goodreads_date(fields.get('user_date_added') or fields.get('pubDate')),
+        shelf=fields.get('user_shelves') or 'to-read',
+    )
+
+
+class GoodreadsFeedParser:
+    """
+    Incremental parser for Goodreads RSS: feed it bytes, get books as their <item>s close.
+
+    Each item is dropped from the tree once converted, so memory stays
+    flat however long the feed is. Raises ElementTree.ParseError on
+    malformed XML.
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._channel = None
+
+    def feed(self, data: bytes) -> Iterator[GoodreadsBook]:
+        self._parser.feed(data)
+        yield from self._read_events()
+
+    def close(self) -> Iterator[GoodreadsBook]:
+        self._parser.close()
+        yield from self._read_events()
+
+    def _read_events(self) -> Iterator[GoodreadsBook]:
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if element.tag == 'channel':
+                    self._channel = element
+            elif element.tag == 'item':
+                yield book_from_item(element)
+                if self._channel is not None:
+                    self._channel.remove(element)
+
+
+def iter_goodreads_feed(chunks: Iterable[bytes]) -> Iterator[GoodreadsBook]:
+    """Stream books out of RSS byte chunks."""
+    parser = GoodreadsFeedParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def page_url(rss_url: str, page: int) -> str:
+    """The RSS URL for one page of the feed."""
+    parts = urlsplit(rss_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'page']
+    if page > 1:
+        query.append(('page', str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def book_feed_key(goodreads_id: Optional[str], title: str, author: Optional[str]) -> str:
+    """Key identifying a book within the feed: its goodreads_id, else title/author."""
+    return goodreads_id or f"{title}|{author or ''}"
+
+
+def _feed_key(book: GoodreadsBook) -> str:
+    return book_feed_key(book.goodreads_id, book.title, book.author)
+
+
+@dataclass
+class FeedPage:
+    """
+    One fetched page of a feed, with the validators to send next time.
+
+    `books` is None when the page is unchanged since the previous fetch
+    (a 304, or the same content hash); `book_keys` then comes from the
+    previous fetch.
+    """
+    number: int
+    url: str
+    books: Optional[List[GoodreadsBook]]
+    book_keys: List[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def unchanged(self) -> bool:
+        return self.books is None
+
+
+async def fetch_goodreads_page(
+    client: httpx.AsyncClient,
+    rss_url: str,
+    page: int,
+    previous: Optional[FeedPage] = None
+) -> FeedPage:
+    """
+    Fetch and parse one page of the feed.
+
+    Books are parsed from the byte stream as it arrives. With a `previous`
+    fetch of the same page, sends If-None-Match / If-Modified-Since, and
+    skips parsing on a 304 or identical content.
+    """
+    url = page_url(rss_url, page)
+    headers = {}
+    if previous and previous.etag:
+        headers['If-None-Match'] = previous.etag
+    if previous and previous.last_modified:
+        headers['If-Modified-Since'] = previous.last_modified
+
+    # With a stored hash, read the whole body first so an unchanged page is
+    # never parsed; otherwise parse while the body is still downloading,
+    # without keeping it
+    stream_parse = not (previous and previous.content_hash)
+    digest = hashlib.sha256()
+    chunks = []
+    books = []
+    parser = GoodreadsFeedParser() if stream_parse else None
+    async with client.stream('GET', url, headers=headers, timeout=GOODREADS_FEED_TIMEOUT) as response:
+        if response.status_code == 304 and previous:
+            return replace(previous, books=None)
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        async for chunk in response.aiter_bytes():
+            digest.update(chunk)
+            if not stream_parse:
+                chunks.append(chunk)
+            elif parser is not None:
+                try:
+                    books.extend(parser.feed(chunk))
+                except ElementTree.ParseError:
+                    parser = None
+
+    content_hash = digest.hexdigest()
+    if previous and previous.content_hash == content_hash:
+        return replace(previous, books=None, etag=etag, last_modified=last_modified)
+
+    malformed = stream_parse and parser is None
+    try:
+        if not stream_parse:
+            books = list(iter_goodreads_feed(chunks))
+        elif parser is not None:
+            books.extend(parser.close())
+    except ElementTree.ParseError:
+        malformed = True
+    if malformed:
+        # Not well-formed XML; feedparser recovers from most of that. A
+        # streamed body was not kept, so fetch it again in full
+        logger.warning(f"Malformed Goodreads feed page {url}, falling back to feedparser")
+        if stream_parse:
+            response = await client.get(url, timeout=GOODREADS_FEED_TIMEOUT)
+            response.raise_for_status()
+            body = response.content
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_hash = hashlib.sha256(body).hexdigest()
+        else:
+            body = b''.join(chunks)
+        books = parse_goodreads_feed(body)
+
+    return FeedPage(
+        number=page,
+        url=url,
+        books=books,
+        book_keys=[_feed_key(book) for book in books],
+        etag=etag,
+        last_modified=last_modified,
+        content_hash=content_hash,
+    )
+
+
+async def iter_goodreads_pages(
+    rss_url: str,
+    previous: Optional[Dict[str, FeedPage]] = None,
+    concurrency: int = GOODREADS_FEED_CONCURRENCY,
+    max_pages: int = GOODREADS_MAX_PAGES
+) -> AsyncIterator[FeedPage]:
+    """
+    Fetch a paged feed concurrently, yielding each page as it arrives.
+
+    Up to `concurrency` pages are in flight over the shared HTTP client.
+    `previous` maps page URLs to their last fetch, for conditional
+    requests. The feed ends at a page shorter than the pages before it,
+    or at the first page that adds no new books (empty, or a repeat of
+    earlier pages); later pages still in flight are dropped. Books
+    already yielded from another page are filtered out of `books`, so
+    pages may arrive in any order. Any failed page raises.
+    """
+    client = get_http_client()
+    previous = previous or {}
+    seen = set()
+    full_page_size = 0
+    last_page = max_pages
+    next_page = 1
+    in_flight = {}
+
+    def schedule():
+        nonlocal next_page
+        while len(in_flight) < concurrency and next_page <= last_page:
+            cached = previous.get(page_url(rss_url, next_page))
+            task = asyncio.create_task(fetch_goodreads_page(client, rss_url, next_page, cached))
+            in_flight[task] = next_page
+            next_page += 1
+
+    try:
+        schedule()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=in_flight.get):
+                number = in_flight.pop(task)
+                page = task.result()
+                if number > last_page:
+                    continue
+                new_keys = [key for key in page.book_keys if key not in seen]
+                if not new_keys:
+                    last_page = number - 1
+                    continue
+                if len(page.book_keys) < full_page_size:
+                    last_page = number
+                full_page_size = max(full_page_size, len(page.book_keys))
+                seen.update(new_keys)
+                if page.books is not None:
+                    new_keys = set(new_keys)
+                    page.books = [book for book in page.books if _feed_key(book) in new_keys]
+                logger.info(
+                    f"Goodreads feed page {number}: {len(new_keys)} books"
+                    + (" (unchanged)" if page.unchanged else "")
+                )
+                yield page
+            for task, number in list(in_flight.items()):
+                if number > last_page:
+                    task.cancel()
+                    del in_flight[task]
+            schedule()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def fetch_goodreads_rss(rss_url: str) -> List[GoodreadsBook]:
+    """
+    Fetch and parse every page of a Goodreads RSS feed.
+
+    Args:
+        rss_url: Full Goodreads RSS URL with key
+
+    Returns:
+        List of parsed books, deduplicated across pages
+    """
+    books = []
+    async for page in iter_goodreads_pages(rss_url):
+        books.extend(page.books)
+    return books
+
+
 def validate_rss_url(url: str) -> bool:
     """Validate that a URL looks like a Goodreads RSS feed."""
     if not url:
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+import asyncio
+
+
+class JobNotifier:
+    """
+    Wakes progress streams when a job in this process makes progress.
+
+    Only a hint: streams still poll the database, so progress made by
+    workers in other processes shows up on the next poll instead.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Event]] = {}
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Event]:
+        """An event set whenever `job_id` is notified; clear it after each wake-up."""
+        event = asyncio.Event()
+        self._subscribers.setdefault(job_id, set()).add(event)
+        try:
+            yield event
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(event)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def notify(self, job_id: str):
+        for event in self._subscribers.get(job_id, ()):
+            event.set()
+
+
+job_notifier = JobNotifier()
@@ -0,0 +1,132 @@
+import httpx
+from typing import Optional
+import json
+import logging
+import re
+
+from .availability_result import AvailabilityResult, AvailabilityStatus
+from .title_cards import card_from_media_item, pick_best_card, result_from_card
+from .title_matcher import MatchKey
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx when installed
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# OverDrive search pages embed their results as `window.OverDrive.mediaItems = {...};`
+MEDIA_ITEMS_PATTERN = re.compile(r'window\.OverDrive\.mediaItems\s*=\s*')
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for OverDrive and Goodreads requests (HTTP/2 when available)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            follow_redirects=True,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            headers={'User-Agent': USER_AGENT},
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (called from the FastAPI lifespan)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def extract_media_items(html: str) -> Optional[dict]:
+    """
+    Pull the embedded `mediaItems` JSON object out of a search page.
+
+    Returns None if the page does not embed it (or it cannot be decoded).
+    """
+    match = MEDIA_ITEMS_PATTERN.search(html)
+    if not match:
+        return None
+    try:
+        items, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except ValueError:
+        return None
+    return items if isinstance(items, dict) else None
+
+
+def parse_search_page(
+    html: str,
+    search_url: str,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    media_id: Optional[str] = None
+) -> Optional[AvailabilityResult]:
+    """
+    Classify a search results page from its embedded data alone.
+
+    Every title on the page is ranked against the requested book, so the
+    status comes from the best-matching edition rather than the first hit.
+    For a title page (`media_id` given) only that title is considered -
+    the page also embeds related titles. Returns None when the page is
+    inconclusive and the browser path should be used instead.
+    """
+    media_items = extract_media_items(html)
+    if media_items is None:
+        return None
+
+    cards = [card_from_media_item(item) for item in media_items.values() if isinstance(item, dict)]
+    if media_id and cards:
+        cards = [card for card in cards if card.media_id == media_id]
+        if not cards:
+            return None
+    if not cards:
+        return AvailabilityResult(
+            status=AvailabilityStatus.NOT_FOUND,
+            search_url=search_url,
+            message="No results found"
+        )
+
+    best = pick_best_card(cards, title, author, wanted=wanted)
+    if best is None:
+        return AvailabilityResult(
+            status=AvailabilityStatus.NOT_FOUND,
+            search_url=search_url,
+            message=f"{len(cards)} results, none matching the title"
+        )
+
+    card, score = best
+    result = result_from_card(card, search_url, score)
+    if result.status == AvailabilityStatus.UNKNOWN:
+        return None
+    return result
+
+
+async def fetch_availability(
+    search_url: str,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    media_id: Optional[str] = None
+) -> Optional[AvailabilityResult]:
+    """
+    Fast path: fetch the search (or title) page over plain HTTP and parse embedded data.
+
+    Returns None on any failure or inconclusive parse.
+    """
+    try:
+        response = await get_http_client().get(search_url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.debug(f"HTTP fast path failed for {search_url}: {e}")
+        return None
+
+    return parse_search_page(response.text, search_url, title, author, wanted, media_id)
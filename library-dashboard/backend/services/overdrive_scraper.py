@@ -1,28 +1,24 @@
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeout
-from dataclasses import dataclass
-from typing import Optional
-from enum import Enum
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeout
+from dataclasses import replace
+from typing import Hashable, Optional
+from urllib.parse import urlparse
 import asyncio
+import logging
 import re
 
+from .availability_result import AvailabilityResult, AvailabilityStatus
+from .browser_pool import browser_pool
+from .overdrive_http import fetch_availability
+from .page_readiness import wait_for_any, wait_for_search_results
+from .title_cards import card_from_media_item, pick_best_card, result_from_card
+from .title_matcher import MatchKey, match_key
+from .resource_blocker import AVAILABILITY_POLICY, BLOCK_RESOURCES, install_resource_blocking
+from .single_flight import SingleFlight
 
-class AvailabilityStatus(str, Enum):
-    AVAILABLE = "available"
-    HOLD = "hold"
-    UNAVAILABLE = "unavailable"
-    NOT_FOUND = "not_found"
-    UNKNOWN = "unknown"
-    ERROR = "error"
+logger = logging.getLogger(__name__)
 
-
-@dataclass
-class AvailabilityResult:
-    status: AvailabilityStatus
-    search_url: str
-    libby_url: Optional[str] = None  # share.libbyapp.com link
-    wait_time: Optional[str] = None  # e.g., "2 weeks"
-    copies_available: Optional[int] = None
-    message: Optional[str] = None
+# Concurrent checks of the same title at the same library share one page load
+availability_flights = SingleFlight("availability")
 
 
 def build_search_url(base_url: str, title: str, author: Optional[str] = None) -> str:
@@ -41,43 +37,198 @@ def build_search_url(base_url: str, title: str, author: Optional[str] = None) ->
     return f"{base_url.rstrip('/')}/search?query={encoded_query}"
 
 
+def build_title_url(base_url: str, media_id: str) -> str:
+    """Build OverDrive title-detail URL for a known media ID."""
+    return f"{base_url.rstrip('/')}/media/{media_id}"
+
+
+def normalize_identifier(isbn: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """
+    Split a stored identifier into (isbn, asin).
+
+    Goodreads puts the ASIN in the ISBN field for Kindle-only editions.
+    """
+    if not isbn:
+        return None, None
+    value = re.sub(r'[^0-9A-Za-z]', '', isbn).upper()
+    if re.fullmatch(r'B0[0-9A-Z]{8}', value):
+        return None, value
+    if re.fullmatch(r'\d{13}|\d{9}[\dX]', value):
+        return value, None
+    return None, None
+
+
+def build_search_urls(
+    base_url: str,
+    title: str,
+    author: Optional[str] = None,
+    isbn: Optional[str] = None,
+    asin: Optional[str] = None
+) -> list[tuple[str, str]]:
+    """
+    Search URLs to try, most specific first, as (strategy, url) pairs.
+
+    Identifier searches return one exact title instead of a fuzzy page of
+    editions; the title+author search is the fallback.
+    """
+    base = base_url.rstrip('/')
+    urls = []
+    if isbn:
+        urls.append(("isbn", f"{base}/search?query={isbn}"))
+    if asin:
+        urls.append(("asin", f"{base}/search?query={asin}"))
+    urls.append(("title", build_search_url(base_url, title, author)))
+    return urls
+
+
+def flight_key(
+    base_url: str,
+    title: str,
+    author: Optional[str],
+    isbn: Optional[str],
+    asin: Optional[str],
+    media_id: Optional[str]
+) -> Hashable:
+    """
+    Identity of an availability check: the library plus the media ID, or
+    the normalized searches it would run. Equal keys give equal results.
+    """
+    library = base_url.rstrip('/').lower()
+    if media_id:
+        return library, "id", media_id
+    return library, "search", tuple(url.lower() for _, url in build_search_urls(base_url, title, author, isbn, asin))
+
+
 async def check_availability(
     base_url: str,
     title: str,
     author: Optional[str] = None,
-    timeout: int = 30000
+    isbn: Optional[str] = None,
+    asin: Optional[str] = None,
+    media_id: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    timeout: int = 30000,
+    use_fast_path: bool = True,
+    block_resources: bool = BLOCK_RESOURCES
 ) -> AvailabilityResult:
     """
     Check book availability on an OverDrive library site.
 
-    Uses Playwright to navigate and detect availability status.
+    With a previously resolved media ID, checks the title-detail page
+    directly. Otherwise (or if that title is gone) searches by ISBN, then
+    ASIN, then title+author, stopping at the first search that finds the
+    book. Results are ranked against `wanted`, the book's precomputed
+    MatchKey (built from title/author if not given). The result's
+    media_id/match_score/resolved_by describe the match so callers can
+    persist it.
+
+    A check for the same library and media ID or search as one already
+    in flight (e.g. a single-book check during a check-all) waits for
+    that check instead of loading the page again.
     """
-    search_url = build_search_url(base_url, title, author)
+    if not asin:
+        isbn, asin = normalize_identifier(isbn)
+
+    result = await availability_flights.do(
+        flight_key(base_url, title, author, isbn, asin, media_id),
+        lambda: _check_availability(
+            base_url, title, author, isbn, asin, media_id, wanted,
+            timeout, use_fast_path, block_resources
+        )
+    )
+    # Callers each get their own copy of the shared result
+    return replace(result)
 
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 720},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            )
-            page = await context.new_page()
 
-            try:
-                await page.goto(search_url, timeout=timeout, wait_until='domcontentloaded')
+async def _check_availability(
+    base_url: str,
+    title: str,
+    author: Optional[str] = None,
+    isbn: Optional[str] = None,
+    asin: Optional[str] = None,
+    media_id: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    timeout: int = 30000,
+    use_fast_path: bool = True,
+    block_resources: bool = BLOCK_RESOURCES
+) -> AvailabilityResult:
+    """The uncoalesced check behind check_availability()."""
+    wanted = wanted or match_key(title, author)
+
+    if media_id:
+        # Still matched against the book: a title page also lists related titles
+        result = await _check_url(
+            build_title_url(base_url, media_id), base_url, title, author, wanted,
+            timeout, use_fast_path, block_resources, media_id=media_id
+        )
+        if result.status not in (AvailabilityStatus.NOT_FOUND, AvailabilityStatus.ERROR):
+            result.media_id = result.media_id or media_id
+            result.resolved_by = "id"
+            return result
+        # Title moved or was withdrawn - fall through and resolve it again
+
+    result = None
+    for strategy, search_url in build_search_urls(base_url, title, author, isbn, asin):
+        result = await _check_url(
+            search_url, base_url, title, author, wanted,
+            timeout, use_fast_path, block_resources
+        )
+        if result.status != AvailabilityStatus.NOT_FOUND:
+            result.resolved_by = strategy
+            logger.debug(f"Resolved '{title}' via {strategy} search: {result.status.value}")
+            break
+
+    return result
+
 
-                # Wait for content to load
-                await page.wait_for_timeout(2000)
+async def _check_url(
+    search_url: str,
+    base_url: str,
+    title: Optional[str],
+    author: Optional[str],
+    wanted: Optional[MatchKey],
+    timeout: int,
+    use_fast_path: bool,
+    block_resources: bool,
+    media_id: Optional[str] = None
+) -> AvailabilityResult:
+    """
+    Check a single search or title page.
 
-                # Try to get the OverDrive media ID for Libby deep link
-                media_id = await _extract_media_id(page)
-                libby_url = f"https://share.libbyapp.com/title/{media_id}" if media_id else None
+    Tries the plain-HTTP fast path first (embedded page data), and only
+    falls back to a page from the shared browser pool when that is
+    inconclusive. For a title page, `media_id` limits the result to that
+    title.
+    """
+    if use_fast_path:
+        result = await fetch_availability(search_url, title, author, wanted, media_id)
+        if result:
+            return result
+
+    try:
+        async with browser_pool.page(
+            viewport={'width': 1280, 'height': 720},
+            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+        ) as page:
+            # Skip images, fonts, media and third-party scripts - only the DOM matters
+            resource_stats = None
+            if block_resources:
+                resource_stats = await install_resource_blocking(
+                    page, AVAILABILITY_POLICY, urlparse(base_url).hostname
+                )
 
-                result = await _detect_availability(page, search_url, libby_url)
-                return result
+            await page.goto(search_url, timeout=timeout, wait_until='domcontentloaded')
 
-            finally:
-                await browser.close()
+            # Wait until results (or a no-results marker) render, capped by a deadline
+            _, ready_ms = await wait_for_search_results(page)
+
+            # Classify in one round trip (also picks up the media ID for the Libby link)
+            result = await _detect_availability(page, search_url, title, author, wanted, media_id)
+            result.ready_ms = ready_ms
+
+            stats_summary = f", {resource_stats.summary()}" if resource_stats else ""
+            logger.info(f"{search_url}: ready in {ready_ms:.0f} ms{stats_summary}")
+            return result
 
     except PlaywrightTimeout:
         return AvailabilityResult(
@@ -93,113 +244,241 @@ async def check_availability(
         )
 
 
-async def _extract_media_id(page: Page) -> Optional[str]:
-    """Extract the OverDrive media ID from search results."""
-    try:
-        # Look for data-media-id attribute on borrow/hold buttons or title cards
-        element = await page.locator('[data-media-id]').first.get_attribute('data-media-id')
-        if element:
-            return element
-    except Exception:
-        pass
-
-    # Try to get from href links
-    try:
-        href = await page.locator('a[href*="/media/"]').first.get_attribute('href')
-        if href:
-            match = re.search(r'/media/(\d+)', href)
-            if match:
-                return match.group(1)
-    except Exception:
-        pass
+# Layer 1: borrow/hold buttons (most reliable - catches cases where "0 results"
+# text exists in hidden elements). `tag:has-text("...")` entries are matched
+# in-page as a case-insensitive substring of the element's text, like Playwright.
+AVAILABLE_SELECTORS = [
+    '.is-borrow',           # OverDrive borrow button class
+    '.js-borrow',           # OverDrive borrow button class
+    'a[aria-label*="Borrow"]',  # Borrow links
+    '.TitleCard-badge--available',
+    '[data-availability="available"]',
+    '.badge-available',
+    '.availability-badge.available',
+    'button:has-text("Borrow")',
+    'a:has-text("Borrow")',
+]
+
+# Layer 2: hold/waitlist indicators
+HOLD_SELECTORS = [
+    '.is-hold',             # OverDrive hold button class
+    '.js-hold',             # OverDrive hold button class
+    'a[aria-label*="Place a hold"]',  # Hold links
+    '.TitleCard-badge--waitlist',
+    '[data-availability="waitlist"]',
+    'button:has-text("Place a Hold")',
+    'button:has-text("Join Waitlist")',
+    'a:has-text("Place a hold")',
+]
+
+# Layer 3: text-based detection over the page HTML (fallback)
+AVAILABILITY_KEYWORDS = {
+    AvailabilityStatus.AVAILABLE: [
+        'borrow now',
+        'available to borrow',
+        'check out',
+        'copies available',
+    ],
+    AvailabilityStatus.HOLD: [
+        'place a hold',
+        'join waitlist',
+        'people waiting',
+        'wait list',
+        'no copies available',
+    ],
+}
+
+# Layer 4: any title cards at all
+TITLE_CARD_SELECTOR = '.TitleCard, .title-card, [class*="TitleCard"]'
+
+# Root element of each result, for per-title extraction
+CARD_ROOT_SELECTOR = '.TitleCard, .title-card'
+
+# Layer 5: no-results markers (only used if no title cards found)
+NO_RESULTS_INDICATORS = [
+    "no results found",
+    "didn't match any titles",
+    "no titles found",
+    "we couldn't find",
+]
+
+WAIT_TIME_SELECTORS = ['.waitlist-info', '[class*="wait"]', '.hold-info']
+
+HAS_TEXT_PATTERN = re.compile(r'^(\w+):has-text\("(.+)"\)$')
+
+# Collects everything classification needs in a single evaluate() round trip
+_FEATURES_JS = """
+({selectors, keywords, titleCardSelector, cardRootSelector, waitSelectors}) => {
+    const hits = {};
+    for (const [name, css, text] of selectors) {
+        try {
+            const els = document.querySelectorAll(css);
+            hits[name] = text === null
+                ? els.length
+                : Array.from(els).filter(el => (el.textContent || '').toLowerCase().includes(text)).length;
+        } catch (e) {
+            hits[name] = 0;
+        }
+    }
+
+    const html = document.documentElement.outerHTML.toLowerCase();
+
+    const mediaIds = [];
+    for (const el of document.querySelectorAll('[data-media-id]')) {
+        const id = el.getAttribute('data-media-id');
+        if (id && !mediaIds.includes(id)) mediaIds.push(id);
+    }
+    for (const a of document.querySelectorAll('a[href*="/media/"]')) {
+        const m = (a.getAttribute('href') || '').match(/\\/media\\/(\\d+)/);
+        if (m && !mediaIds.includes(m[1])) mediaIds.push(m[1]);
+    }
+
+    const waitTexts = [];
+    for (const sel of waitSelectors) {
+        for (const el of document.querySelectorAll(sel)) {
+            const t = (el.textContent || '').toLowerCase();
+            if (t.includes('week')) waitTexts.push(t);
+        }
+    }
+
+    // Per-title data: prefer the embedded mediaItems, else scrape each card root
+    let cards = [];
+    const embedded = window.OverDrive && window.OverDrive.mediaItems;
+    if (embedded && typeof embedded === 'object') {
+        cards = Object.values(embedded);
+    } else {
+        for (const el of document.querySelectorAll(cardRootSelector)) {
+            const text = sel => {
+                const e = el.querySelector(sel);
+                return e ? e.textContent.trim() : null;
+            };
+            const idEl = el.hasAttribute('data-media-id') ? el : el.querySelector('[data-media-id]');
+            const cardText = (el.textContent || '').toLowerCase();
+            const cls = (el.className || '').toString().toLowerCase();
+            let format = null;
+            for (const f of ['audiobook', 'magazine', 'video', 'ebook']) {
+                if (cls.includes(f) || cardText.includes(f)) { format = f; break; }
+            }
+            cards.push({
+                id: idEl ? idEl.getAttribute('data-media-id') : null,
+                title: text('.title-name, .TitleCard-title, h3, h2'),
+                firstCreatorName: text('.title-author, .TitleCard-author, .creator'),
+                type: format,
+                isAvailable: !!el.querySelector('.is-borrow, .js-borrow, .TitleCard-badge--available, [data-availability="available"]'),
+                isHoldable: !!el.querySelector('.is-hold, .js-hold, .TitleCard-badge--waitlist, [data-availability="waitlist"]'),
+                text: cardText,
+            });
+        }
+    }
 
+    return {
+        selector_hits: hits,
+        cards: cards,
+        keywords_found: keywords.filter(k => html.includes(k)),
+        title_cards: document.querySelectorAll(titleCardSelector).length,
+        media_ids: mediaIds,
+        wait_texts: waitTexts,
+    };
+}
+"""
+
+
+def _selector_spec(selector: str) -> list:
+    """Turn a selector into [name, css, text-or-None] for the in-page script."""
+    match = HAS_TEXT_PATTERN.match(selector)
+    if match:
+        return [selector, match.group(1), match.group(2).lower()]
+    return [selector, selector, None]
+
+
+_FEATURES_ARG = {
+    "selectors": [_selector_spec(s) for s in AVAILABLE_SELECTORS + HOLD_SELECTORS],
+    "keywords": [k for keywords in AVAILABILITY_KEYWORDS.values() for k in keywords] + NO_RESULTS_INDICATORS,
+    "titleCardSelector": TITLE_CARD_SELECTOR,
+    "cardRootSelector": CARD_ROOT_SELECTOR,
+    "waitSelectors": WAIT_TIME_SELECTORS,
+}
+
+
+async def collect_page_features(page: Page) -> dict:
+    """
+    Gather selector hit counts, keyword matches, title-card count, media IDs,
+    wait-time text and per-title card data from the page in one in-page
+    evaluation.
+    """
+    return await page.evaluate(_FEATURES_JS, _FEATURES_ARG)
+
+
+def _wait_time_from_texts(wait_texts: list) -> Optional[str]:
+    """Pull the first 'N weeks' estimate out of the collected wait-time texts."""
+    for text in wait_texts:
+        match = re.search(r'(\d+)\s*week', text)
+        if match:
+            return f"{match.group(1)} weeks"
     return None
 
 
-async def _detect_availability(page: Page, search_url: str, libby_url: Optional[str] = None) -> AvailabilityResult:
+def classify_page_features(
+    features: dict,
+    search_url: str,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    media_id: Optional[str] = None
+) -> AvailabilityResult:
     """
-    Detect availability status from page content.
+    Detect availability status from a page feature vector.
 
-    Uses multiple detection layers for robustness.
+    When individual titles could be read off the page, each one is ranked
+    against the requested book and the best match decides the status.
+    Otherwise falls back to page-wide detection layers. On a title page
+    (`media_id` given) cards of other titles are ignored.
     """
-    # Layer 1: Check for borrow/hold buttons FIRST (most reliable)
-    # This catches cases where "0 results" text exists in hidden elements
-    available_selectors = [
-        '.is-borrow',           # OverDrive borrow button class
-        '.js-borrow',           # OverDrive borrow button class
-        'a[aria-label*="Borrow"]',  # Borrow links
-        '.TitleCard-badge--available',
-        '[data-availability="available"]',
-        '.badge-available',
-        '.availability-badge.available',
-        'button:has-text("Borrow")',
-        'a:has-text("Borrow")',
-    ]
-
-    for selector in available_selectors:
-        try:
-            count = await page.locator(selector).count()
-            if count > 0:
-                return AvailabilityResult(
-                    status=AvailabilityStatus.AVAILABLE,
-                    search_url=search_url,
-                    libby_url=libby_url,
-                    message="Available to borrow"
-                )
-        except Exception:
-            continue
-
-    # Layer 2: Check for hold/waitlist indicators
-    hold_selectors = [
-        '.is-hold',             # OverDrive hold button class
-        '.js-hold',             # OverDrive hold button class
-        'a[aria-label*="Place a hold"]',  # Hold links
-        '.TitleCard-badge--waitlist',
-        '[data-availability="waitlist"]',
-        'button:has-text("Place a Hold")',
-        'button:has-text("Join Waitlist")',
-        'a:has-text("Place a hold")',
-    ]
-
-    for selector in hold_selectors:
-        try:
-            count = await page.locator(selector).count()
-            if count > 0:
-                # Try to extract wait time
-                wait_time = await _extract_wait_time(page)
-                return AvailabilityResult(
-                    status=AvailabilityStatus.HOLD,
-                    search_url=search_url,
-                    libby_url=libby_url,
-                    wait_time=wait_time,
-                    message="Available to place hold"
-                )
-        except Exception:
-            continue
-
-    # Layer 3: Text-based detection (fallback)
-    page_content = await page.content()
-    page_text = page_content.lower()
-
-    availability_keywords = {
-        AvailabilityStatus.AVAILABLE: [
-            'borrow now',
-            'available to borrow',
-            'check out',
-            'copies available',
-        ],
-        AvailabilityStatus.HOLD: [
-            'place a hold',
-            'join waitlist',
-            'people waiting',
-            'wait list',
-            'no copies available',
-        ],
-    }
+    cards = [card_from_media_item(item) for item in features.get("cards", []) if isinstance(item, dict)]
+    cards = [card for card in cards if card.title and (not media_id or card.media_id == media_id)]
+    if cards:
+        best = pick_best_card(cards, title, author, wanted=wanted)
+        if best is None:
+            return AvailabilityResult(
+                status=AvailabilityStatus.NOT_FOUND,
+                search_url=search_url,
+                message=f"{len(cards)} results, none matching the title"
+            )
+        card, score = best
+        result = result_from_card(card, search_url, score)
+        if result.status == AvailabilityStatus.HOLD and not result.wait_time:
+            result.wait_time = _wait_time_from_texts(features.get("wait_texts", []))
+        if result.status != AvailabilityStatus.UNKNOWN:
+            return result
+
+    hits = features.get("selector_hits", {})
+    keywords_found = set(features.get("keywords_found", []))
+    media_ids = [media_id] if media_id else features.get("media_ids", [])
+    libby_url = f"https://share.libbyapp.com/title/{media_ids[0]}" if media_ids else None
+
+    # Layer 1: borrow buttons
+    if any(hits.get(s) for s in AVAILABLE_SELECTORS):
+        return AvailabilityResult(
+            status=AvailabilityStatus.AVAILABLE,
+            search_url=search_url,
+            libby_url=libby_url,
+            message="Available to borrow"
+        )
+
+    # Layer 2: hold/waitlist buttons
+    if any(hits.get(s) for s in HOLD_SELECTORS):
+        return AvailabilityResult(
+            status=AvailabilityStatus.HOLD,
+            search_url=search_url,
+            libby_url=libby_url,
+            wait_time=_wait_time_from_texts(features.get("wait_texts", [])),
+            message="Available to place hold"
+        )
 
-    for status, keywords in availability_keywords.items():
+    # Layer 3: keywords
+    for status, keywords in AVAILABILITY_KEYWORDS.items():
         for keyword in keywords:
-            if keyword in page_text:
+            if keyword in keywords_found:
                 return AvailabilityResult(
                     status=status,
                     search_url=search_url,
@@ -207,10 +486,8 @@ async def _detect_availability(page: Page, search_url: str, libby_url: Optional[
                     message=f"Detected via keyword: {keyword}"
                 )
 
-    # Layer 4: Check if we found any title cards at all
-    title_cards = await page.locator('.TitleCard, .title-card, [class*="TitleCard"]').count()
-    if title_cards > 0:
-        # Found results but couldn't determine availability
+    # Layer 4: found results but couldn't determine availability
+    if features.get("title_cards", 0) > 0:
         return AvailabilityResult(
             status=AvailabilityStatus.UNKNOWN,
             search_url=search_url,
@@ -218,20 +495,13 @@ async def _detect_availability(page: Page, search_url: str, libby_url: Optional[
             message="Found results but couldn't determine availability"
         )
 
-    # Layer 5: Check for no results (only if no title cards found)
-    no_results_indicators = [
-        "no results found",
-        "didn't match any titles",
-        "no titles found",
-        "we couldn't find"
-    ]
-    for indicator in no_results_indicators:
-        if indicator in page_text:
-            return AvailabilityResult(
-                status=AvailabilityStatus.NOT_FOUND,
-                search_url=search_url,
-                message="No results found"
-            )
+    # Layer 5: explicit no-results marker
+    if any(indicator in keywords_found for indicator in NO_RESULTS_INDICATORS):
+        return AvailabilityResult(
+            status=AvailabilityStatus.NOT_FOUND,
+            search_url=search_url,
+            message="No results found"
+        )
 
     # No results found
     return AvailabilityResult(
@@ -241,28 +511,17 @@ async def _detect_availability(page: Page, search_url: str, libby_url: Optional[
     )
 
 
-async def _extract_wait_time(page: Page) -> Optional[str]:
-    """Try to extract estimated wait time from page."""
-    try:
-        # Common patterns for wait time
-        wait_selectors = [
-            '.waitlist-info',
-            '[class*="wait"]',
-            '.hold-info',
-        ]
-
-        for selector in wait_selectors:
-            elements = await page.locator(selector).all()
-            for element in elements:
-                text = await element.text_content()
-                if text and 'week' in text.lower():
-                    # Extract time info
-                    match = re.search(r'(\d+)\s*week', text.lower())
-                    if match:
-                        return f"{match.group(1)} weeks"
-        return None
-    except Exception:
-        return None
+async def _detect_availability(
+    page: Page,
+    search_url: str,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    wanted: Optional[MatchKey] = None,
+    media_id: Optional[str] = None
+) -> AvailabilityResult:
+    """Detect availability status from page content in one browser round trip."""
+    features = await collect_page_features(page)
+    return classify_page_features(features, search_url, title, author, wanted, media_id)
 
 
 async def perform_checkout(
@@ -283,11 +542,12 @@ async def perform_checkout(
         if await button.count() == 0:
             return False, f"Could not find {action} button"
 
+        success_indicators = ['borrowed', 'checked out', 'hold placed', 'added to holds']
+
         await button.click()
-        await page.wait_for_timeout(3000)
+        await wait_for_any(page, texts=success_indicators, timeout=5000)
 
         # Check for success indicators
-        success_indicators = ['borrowed', 'checked out', 'hold placed', 'added to holds']
         page_text = (await page.content()).lower()
 
         for indicator in success_indicators:
@@ -315,7 +575,11 @@ async def login_to_library(
         signin_button = page.locator('button:has-text("Sign In"), .signin-button, [class*="signin"]').first
         if await signin_button.count() > 0:
             await signin_button.click()
-            await page.wait_for_timeout(2000)
+            await wait_for_any(
+                page,
+                selectors=['#username', 'input[name="username"]', 'input[type="password"]'],
+                timeout=5000
+            )
 
         # Fill credentials
         username_field = page.locator('#username, input[name="username"], input[type="text"]').first
@@ -329,12 +593,12 @@ async def login_to_library(
 
         # Submit
         submit_button = page.locator('button[type="submit"], button:has-text("Sign In")').first
-        await submit_button.click()
+        logged_in_indicators = ['my account', 'sign out', 'log out', 'my loans']
 
-        await page.wait_for_timeout(3000)
+        await submit_button.click()
+        await wait_for_any(page, texts=logged_in_indicators + ['invalid', 'incorrect'], timeout=5000)
 
         # Check if login succeeded (look for account menu or similar)
-        logged_in_indicators = ['my account', 'sign out', 'log out', 'my loans']
         page_text = (await page.content()).lower()
 
         for indicator in logged_in_indicators:
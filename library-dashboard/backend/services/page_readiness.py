@@ -0,0 +1,70 @@
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeout
+from typing import Sequence
+import time
+
+# Something that means the search has rendered results
+RESULT_SELECTORS = [
+    '.TitleCard',
+    '.title-card',
+    '[class*="TitleCard"]',
+    '[data-media-id]',
+]
+
+# Something that means the search has rendered and found nothing
+NO_RESULTS_SELECTORS = [
+    '.no-results',
+    '.search-no-results',
+]
+NO_RESULTS_TEXTS = [
+    "no results found",
+    "didn't match any titles",
+    "no titles found",
+    "we couldn't find",
+]
+
+# Checked every POLL_MS until one of the selectors/texts shows up
+_READY_JS = """
+([selectors, texts]) => {
+    if (selectors.some(s => document.querySelector(s))) return true;
+    if (!texts.length || !document.body) return false;
+    const text = document.body.innerText.toLowerCase();
+    return texts.some(t => text.includes(t));
+}
+"""
+POLL_MS = 100
+
+
+async def wait_for_any(
+    page: Page,
+    selectors: Sequence[str] = (),
+    texts: Sequence[str] = (),
+    timeout: int = 5000
+) -> tuple[bool, float]:
+    """
+    Wait until any selector matches or any text (lowercase) appears on the page.
+
+    Returns (ready, waited_ms). Hitting the deadline is not an error - the
+    caller just proceeds with whatever has rendered, as the old fixed sleeps did.
+    """
+    start = time.perf_counter()
+    try:
+        await page.wait_for_function(
+            _READY_JS,
+            arg=[list(selectors), [t.lower() for t in texts]],
+            polling=POLL_MS,
+            timeout=timeout
+        )
+        ready = True
+    except PlaywrightTimeout:
+        ready = False
+    return ready, (time.perf_counter() - start) * 1000
+
+
+async def wait_for_search_results(page: Page, timeout: int = 5000) -> tuple[bool, float]:
+    """Wait until a search page shows either a result card or a no-results marker."""
+    return await wait_for_any(
+        page,
+        selectors=RESULT_SELECTORS + NO_RESULTS_SELECTORS,
+        texts=NO_RESULTS_TEXTS,
+        timeout=timeout
+    )
@@ -0,0 +1,112 @@
+from playwright.async_api import Page, Route, Response
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import urlparse
+import os
+
+# Set BLOCK_RESOURCES=0 to let availability pages load everything
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") != "0"
+
+# Rough transfer size per blocked request, used only for the savings estimate
+TYPICAL_BYTES = {
+    "image": 40_000,
+    "font": 30_000,
+    "media": 500_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+}
+DEFAULT_TYPICAL_BYTES = 5_000
+
+
+def _host_matches(host: str, domains: Tuple[str, ...]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    """Allow/deny rules for requests made by a scraping page."""
+    blocked_types: FrozenSet[str] = frozenset({"image", "font", "media"})
+    block_third_party_scripts: bool = True
+    # Domains always allowed through (besides the library's own host)
+    allowed_domains: Tuple[str, ...] = ("overdrive.com", "od-cdn.com")
+    # Domains always blocked, whatever the resource type
+    blocked_domains: Tuple[str, ...] = (
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "hotjar.com",
+        "newrelic.com",
+        "nr-data.net",
+        "quantserve.com",
+        "scorecardresearch.com",
+    )
+
+    def should_block(self, url: str, resource_type: str, first_party_host: Optional[str] = None) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        if _host_matches(host, self.blocked_domains):
+            return True
+        if resource_type in self.blocked_types:
+            return True
+        if self.block_third_party_scripts and resource_type == "script":
+            first_party = host == first_party_host or _host_matches(host, self.allowed_domains)
+            return not first_party
+        return False
+
+
+# Availability checks only need the DOM
+AVAILABILITY_POLICY = ResourcePolicy()
+
+# Login/checkout may depend on third-party scripts (SSO, captcha), so keep them
+CHECKOUT_POLICY = ResourcePolicy(block_third_party_scripts=False)
+
+
+@dataclass
+class ResourceStats:
+    """Per-page request accounting for a resource policy."""
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+    bytes_loaded: int = 0
+    est_bytes_saved: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests_blocked} requests blocked "
+            f"(~{self.est_bytes_saved // 1024} KB saved), "
+            f"{self.requests_allowed} allowed ({self.bytes_loaded // 1024} KB loaded)"
+        )
+
+
+async def install_resource_blocking(
+    page: Page,
+    policy: ResourcePolicy = AVAILABILITY_POLICY,
+    first_party_host: Optional[str] = None
+) -> ResourceStats:
+    """
+    Intercept every request on the page and abort those the policy rejects.
+
+    Returns a stats object that keeps updating while the page is in use.
+    """
+    stats = ResourceStats()
+
+    async def handle(route: Route):
+        request = route.request
+        if policy.should_block(request.url, request.resource_type, first_party_host):
+            stats.requests_blocked += 1
+            stats.blocked_by_type[request.resource_type] = stats.blocked_by_type.get(request.resource_type, 0) + 1
+            stats.est_bytes_saved += TYPICAL_BYTES.get(request.resource_type, DEFAULT_TYPICAL_BYTES)
+            await route.abort()
+        else:
+            stats.requests_allowed += 1
+            await route.continue_()
+
+    def on_response(response: Response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            stats.bytes_loaded += int(length)
+
+    await page.route("**/*", handle)
+    page.on("response", on_response)
+    return stats
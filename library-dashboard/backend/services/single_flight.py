@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    """How many calls ran, and how many joined a call already in flight."""
+    executed: int = 0
+    coalesced: int = 0
+
+    @property
+    def calls(self) -> int:
+        return self.executed + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.calls} calls, {self.executed} executed, "
+            f"{self.coalesced} coalesced ({self.hit_rate:.0%} hit rate)"
+        )
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    While a call for a key is running, later callers with the same key
+    await its result (or exception) instead of starting their own. Nothing
+    is kept once the call finishes - the next caller runs it afresh.
+
+    In-process only: callers in other worker processes are not coalesced.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = FlightStats()
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            self.stats.executed += 1
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.stats.coalesced += 1
+            logger.debug(f"{self.name}: joined in-flight call for {key}")
+
+        # A cancelled caller must not cancel the call for everyone else waiting on it
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark the exception retrieved even if every caller has gone away
+            flight.exception()
@@ -0,0 +1,160 @@
+from typing import List, Optional, Sequence, Tuple
+import re
+
+from .availability_result import AvailabilityResult, AvailabilityStatus, TitleCard
+from .title_matcher import MatchKey, match_key, similarity
+
+# Minimum similarity for a card to count as the requested book
+MIN_MATCH_SCORE = 0.5
+
+# Cards scoring within this of the best match are treated as the same work,
+# and picked between by availability and format instead
+SAME_WORK_MARGIN = 0.1
+
+DEFAULT_PREFERRED_FORMATS = ("ebook", "audiobook")
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_id(item: dict) -> Optional[str]:
+    fmt = item.get('type')
+    if isinstance(fmt, dict):
+        fmt = fmt.get('id')
+    return fmt.lower() if isinstance(fmt, str) else None
+
+
+def card_from_media_item(item: dict) -> TitleCard:
+    """
+    Build a TitleCard from an OverDrive `mediaItems` entry.
+
+    Cards scraped from the DOM are sent in the same shape, with the card's
+    visible text under `text` for counts that are only shown as prose.
+    """
+    text = (item.get('text') or '').lower()
+
+    copies_available = _to_int(item.get('availableCopies'))
+    copies_owned = _to_int(item.get('ownedCopies'))
+    holds_count = _to_int(item.get('holdsCount'))
+
+    if text:
+        match = re.search(r'(\d+)\s+of\s+(\d+)\s+cop', text)
+        if match:
+            copies_available = copies_available if copies_available is not None else int(match.group(1))
+            copies_owned = copies_owned if copies_owned is not None else int(match.group(2))
+        match = re.search(r'(\d+)\s+(?:people|patrons|holds?)\b', text)
+        if match and holds_count is None:
+            holds_count = int(match.group(1))
+
+    return TitleCard(
+        media_id=str(item['id']) if item.get('id') else None,
+        title=item.get('title'),
+        author=item.get('firstCreatorName'),
+        format=_format_id(item),
+        copies_owned=copies_owned,
+        copies_available=copies_available,
+        holds_count=holds_count,
+        is_available=bool(item.get('isAvailable')),
+        is_holdable=bool(item.get('isHoldable')),
+        wait_days=_to_int(item.get('estimatedWaitDays')),
+    )
+
+
+def score_card(
+    card: TitleCard,
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    wanted: Optional[MatchKey] = None
+) -> float:
+    """Similarity (0-1) of a card to the requested book (or its precomputed key)."""
+    wanted = wanted or match_key(title, author)
+    return similarity(wanted, match_key(card.title, card.author))
+
+
+def _availability_rank(card: TitleCard) -> int:
+    if card.is_available:
+        return 0
+    if card.is_holdable or card.copies_owned:
+        return 1
+    return 2
+
+
+def _format_rank(card: TitleCard, preferred_formats: Sequence[str]) -> int:
+    if card.format in preferred_formats:
+        return list(preferred_formats).index(card.format)
+    return len(preferred_formats)
+
+
+def pick_best_card(
+    cards: List[TitleCard],
+    title: Optional[str] = None,
+    author: Optional[str] = None,
+    preferred_formats: Sequence[str] = DEFAULT_PREFERRED_FORMATS,
+    wanted: Optional[MatchKey] = None
+) -> Optional[Tuple[TitleCard, Optional[float]]]:
+    """
+    Rank every card against the requested book and return (card, score).
+
+    Among cards that match the book about equally well, the most available
+    one in the most preferred format wins. `wanted` is the book's
+    precomputed MatchKey; without it or a title, or when the title has no
+    words to compare, cards are ranked on availability and format alone.
+    Returns None if nothing matches.
+    """
+    if not cards:
+        return None
+
+    if not wanted and title:
+        wanted = match_key(title, author)
+    if not wanted or not wanted.title_tokens:
+        best = min(cards, key=lambda c: (_availability_rank(c), _format_rank(c, preferred_formats)))
+        return best, None
+
+    scored = [(card, score_card(card, wanted=wanted)) for card in cards]
+    top_score = max(score for _, score in scored)
+    if top_score < MIN_MATCH_SCORE:
+        return None
+
+    same_work = [(card, score) for card, score in scored if score >= top_score - SAME_WORK_MARGIN]
+    return min(
+        same_work,
+        key=lambda cs: (_availability_rank(cs[0]), _format_rank(cs[0], preferred_formats), -cs[1])
+    )
+
+
+def _wait_time(card: TitleCard) -> Optional[str]:
+    """Format OverDrive's estimated wait (in days) the way the page text does."""
+    if card.wait_days and card.wait_days > 0:
+        return f"{max(1, round(card.wait_days / 7))} weeks"
+    return None
+
+
+def result_from_card(card: TitleCard, search_url: str, score: Optional[float] = None) -> AvailabilityResult:
+    """Availability result for the chosen card."""
+    libby_url = f"https://share.libbyapp.com/title/{card.media_id}" if card.media_id else None
+    fmt = f" ({card.format})" if card.format else ""
+
+    if card.is_available:
+        status = AvailabilityStatus.AVAILABLE
+        message = f"Available to borrow{fmt}"
+    elif card.is_holdable or card.copies_owned:
+        status = AvailabilityStatus.HOLD
+        message = f"Available to place hold{fmt}"
+    else:
+        status = AvailabilityStatus.UNKNOWN
+        message = f"Found title but couldn't determine availability{fmt}"
+
+    return AvailabilityResult(
+        status=status,
+        search_url=search_url,
+        libby_url=libby_url,
+        wait_time=_wait_time(card) if status == AvailabilityStatus.HOLD else None,
+        copies_available=card.copies_available,
+        message=message,
+        media_id=card.media_id,
+        match_score=score,
+    )
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Optional
+import re
+import unicodedata
+
+# Dropped from titles before comparing - they only add noise to overlap scores
+STOPWORDS = frozenset({"a", "an", "the", "and", "of"})
+
+# Series markers: "(The Expanse, #1)", "[Book 2]", "Book 3", "Vol. 4", "#5"
+SERIES_PATTERN = re.compile(
+    r'\([^)]*#\s*\d+[^)]*\)|\[[^\]]*\]|\b(?:book|vol(?:ume)?|part)\.?\s*\d+\b|#\s*\d+',
+    re.IGNORECASE
+)
+# Subtitle / alternate-title separators - everything after the first one is dropped
+SUBTITLE_PATTERN = re.compile(r'\s*(?::|\s-\s|\s—\s|\(|,\s+or\s)')
+# Runs of letters and digits in any script, so non-Latin titles still produce words
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# Share of the title score kept when the authors don't match at all
+AUTHOR_FLOOR = 0.7
+
+
+def _fold(value: str) -> str:
+    """Lowercase and strip accents."""
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in value if not unicodedata.combining(c)).lower()
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """
+    Canonical title key: no series markers, no subtitle, no stopwords.
+
+    "The Eye of the World (The Wheel of Time, #1)" -> "eye world"
+    """
+    if not title:
+        return ''
+    value = SERIES_PATTERN.sub(' ', _fold(title))
+    main = SUBTITLE_PATTERN.split(value, maxsplit=1)[0]
+    words = [w for w in WORD_PATTERN.findall(main) if w not in STOPWORDS]
+    if not words:
+        # Title was nothing but stopwords/subtitle - keep whatever words it had
+        words = WORD_PATTERN.findall(value)
+    return ' '.join(words)
+
+
+def normalize_author(author: Optional[str]) -> str:
+    """
+    Canonical author key with initials joined: "J. R. R. Tolkien" -> "jrr tolkien".
+    """
+    if not author:
+        return ''
+    value = _fold(author)
+    # "Tolkien, J.R.R." -> "J.R.R. Tolkien"
+    if value.count(',') == 1:
+        last, first = value.split(',')
+        value = f"{first} {last}"
+
+    words = []
+    in_initials = False
+    for word in WORD_PATTERN.findall(value):
+        # Merge runs of initials: j r r -> jrr
+        if len(word) == 1 and in_initials:
+            words[-1] += word
+        else:
+            words.append(word)
+        in_initials = len(word) == 1
+    return ' '.join(words)
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a key, padded so short words still produce some."""
+    if not key:
+        return frozenset()
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass(frozen=True)
+class MatchKey:
+    """Precomputed token and trigram sets for one title/author."""
+    title_tokens: FrozenSet[str]
+    title_trigrams: FrozenSet[str]
+    author_tokens: FrozenSet[str]
+    surname: Optional[str]
+
+
+@lru_cache(maxsize=50000)
+def key_from_normalized(title_key: str, author_key: str = '') -> MatchKey:
+    """Build a MatchKey from already-normalized keys (as stored on Book)."""
+    author_tokens = author_key.split()
+    return MatchKey(
+        title_tokens=frozenset(title_key.split()),
+        title_trigrams=trigrams(title_key),
+        author_tokens=frozenset(author_tokens),
+        surname=author_tokens[-1] if author_tokens else None,
+    )
+
+
+def match_key(title: Optional[str], author: Optional[str] = None) -> MatchKey:
+    """Normalize a raw title/author and build its MatchKey."""
+    return key_from_normalized(normalize_title(title), normalize_author(author))
+
+
+def book_match_key(book) -> MatchKey:
+    """MatchKey for a Book, using its stored keys when they were computed at sync."""
+    if book.title_key is not None:
+        return key_from_normalized(book.title_key, book.author_key or '')
+    return match_key(book.title, book.author)
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def similarity(wanted: MatchKey, candidate: MatchKey) -> float:
+    """
+    0-1 similarity of a candidate title/author to the wanted one.
+
+    Title similarity averages word and trigram overlap, so small spelling
+    and punctuation differences still score well while extra words (a
+    companion volume, a sequel) pull the score down. When both sides have
+    an author, a mismatch scales the score down to AUTHOR_FLOOR; an equal
+    surname counts as a full author match. A matching author never lifts
+    a poor title match.
+    """
+    title_score = (
+        _jaccard(wanted.title_tokens, candidate.title_tokens) +
+        _jaccard(wanted.title_trigrams, candidate.title_trigrams)
+    ) / 2
+
+    if not wanted.author_tokens or not candidate.author_tokens:
+        return title_score
+
+    if wanted.surname and wanted.surname == candidate.surname:
+        author_score = 1.0
+    else:
+        author_score = _jaccard(wanted.author_tokens, candidate.author_tokens)
+    return title_score * (AUTHOR_FLOOR + (1 - AUTHOR_FLOOR) * author_score)
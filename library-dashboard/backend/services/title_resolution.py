@@ -0,0 +1,84 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+import os
+
+from models import TitleResolution
+from .availability_result import AvailabilityResult, AvailabilityStatus
+
+# Re-run a full search for resolutions older than this
+RESOLUTION_MAX_AGE_DAYS = int(os.getenv("RESOLUTION_MAX_AGE_DAYS", "30"))
+
+# Title-search matches scoring below this are re-searched on every refresh
+MIN_RESOLUTION_CONFIDENCE = 0.7
+
+
+def is_resolution_fresh(resolution: Optional[TitleResolution]) -> bool:
+    """Whether a stored resolution can be used for a by-ID check."""
+    if not resolution or not resolution.media_id or not resolution.resolved_at:
+        return False
+    if resolution.resolved_at < datetime.utcnow() - timedelta(days=RESOLUTION_MAX_AGE_DAYS):
+        return False
+    if resolution.confidence is not None and resolution.confidence < MIN_RESOLUTION_CONFIDENCE:
+        return False
+    return True
+
+
+def usable_media_id(resolution: Optional[TitleResolution]) -> Optional[str]:
+    """Media ID to check directly, or None if a full search is needed."""
+    return resolution.media_id if is_resolution_fresh(resolution) else None
+
+
+async def get_resolution(db: AsyncSession, book_id: int, library_id: int) -> Optional[TitleResolution]:
+    return await db.scalar(select(TitleResolution).where(
+        TitleResolution.book_id == book_id,
+        TitleResolution.library_id == library_id
+    ))
+
+
+async def load_resolutions(db: AsyncSession, book_ids: Iterable[int]) -> Dict[Tuple[int, int], TitleResolution]:
+    """All resolutions for the given books, keyed by (book_id, library_id)."""
+    book_ids = list(book_ids)
+    if not book_ids:
+        return {}
+    rows = (await db.scalars(select(TitleResolution).where(TitleResolution.book_id.in_(book_ids)))).all()
+    return {(r.book_id, r.library_id): r for r in rows}
+
+
+async def record_resolution(
+    db: AsyncSession,
+    book_id: int,
+    library_id: int,
+    resolution: Optional[TitleResolution],
+    result: AvailabilityResult
+) -> Optional[TitleResolution]:
+    """
+    Update the stored resolution from a check result (does not commit).
+
+    A by-ID check that still finds the title keeps the resolution as is -
+    it never points it at another media ID; a new search match replaces
+    it; a confirmed not-found drops it.
+    """
+    if result.status == AvailabilityStatus.ERROR:
+        return resolution
+
+    if result.status == AvailabilityStatus.NOT_FOUND or not result.media_id:
+        if resolution and result.status == AvailabilityStatus.NOT_FOUND:
+            await db.delete(resolution)
+            return None
+        return resolution
+
+    if result.resolved_by == "id":
+        # A by-ID check confirms the stored title; only a search may point it elsewhere
+        return resolution
+
+    if not resolution:
+        resolution = TitleResolution(book_id=book_id, library_id=library_id)
+        db.add(resolution)
+
+    resolution.media_id = result.media_id
+    resolution.confidence = result.match_score
+    resolution.strategy = result.resolved_by
+    resolution.resolved_at = datetime.utcnow()
+    return resolution
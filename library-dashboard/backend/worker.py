@@ -0,0 +1,37 @@
+"""
+Standalone availability check worker.
+
+Claims book x library checks queued by POST /api/availability/check-all.
+Start as many as needed alongside the API to add check throughput (set
+EMBEDDED_CHECK_WORKER=0 on the API to keep checks out of the web process):
+
+    python worker.py
+"""
+import asyncio
+import logging
+import signal
+
+from models import init_db
+from services import browser_pool, close_http_client, CheckWorker, result_writer
+
+
+async def main():
+    await init_db()
+    await browser_pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await CheckWorker().run(stop)
+    finally:
+        await result_writer.flush()
+        await browser_pool.stop()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,19 +1,35 @@
 'use client'
 
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
+import { RefreshCw } from 'lucide-react'
 import Header from '@/components/Header'
 import BookGrid from '@/components/BookGrid'
-import { BookWithAvailability, getBooks } from '@/lib/api'
+import {
+  Availability, BookWithAvailability, DashboardStats, JobStatus,
+  checkAllAvailability, getBooksPage, getDashboardStats, streamJob
+} from '@/lib/api'
+
+const PAGE_SIZE = 50
 
 export default function Dashboard() {
   const [books, setBooks] = useState<BookWithAvailability[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
+  const [stats, setStats] = useState<DashboardStats | null>(null)
+  const [job, setJob] = useState<JobStatus | null>(null)
+  const stopStream = useRef<(() => void) | null>(null)
+
+  const fetchStats = useCallback(async () => {
+    setStats(await getDashboardStats())
+  }, [])
 
   const fetchBooks = useCallback(async () => {
     try {
-      const data = await getBooks()
-      setBooks(data)
+      const [page] = await Promise.all([getBooksPage(null, PAGE_SIZE), fetchStats()])
+      setBooks(page.items)
+      setNextCursor(page.next_cursor)
       setError(null)
     } catch (err) {
       console.error('Failed to fetch books:', err)
@@ -21,36 +37,85 @@ export default function Dashboard() {
     } finally {
       setIsLoading(false)
     }
-  }, [])
+  }, [fetchStats])
+
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setIsLoadingMore(true)
+    try {
+      const page = await getBooksPage(nextCursor, PAGE_SIZE)
+      setBooks(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      console.error('Failed to load more books:', err)
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
 
   useEffect(() => {
     fetchBooks()
   }, [fetchBooks])
 
+  useEffect(() => () => stopStream.current?.(), [])
+
+  // Replace one book x library badge in place as its result arrives
+  const patchAvailability = (result: Availability) => {
+    setBooks(prev =>
+      prev.map(book =>
+        book.id === result.book_id
+          ? {
+              ...book,
+              availability: [
+                ...book.availability.filter(a => a.library_id !== result.library_id),
+                result,
+              ],
+            }
+          : book
+      )
+    )
+  }
+
+  const checkAll = async () => {
+    try {
+      const { job_id } = await checkAllAvailability()
+      stopStream.current?.()
+      stopStream.current = streamJob(job_id, {
+        onResult: patchAvailability,
+        onProgress: setJob,
+        onEnd: () => {
+          setJob(null)
+          fetchStats().catch(err => console.error('Failed to refresh stats:', err))
+        },
+      })
+    } catch (err) {
+      console.error('Failed to start availability check:', err)
+    }
+  }
+
+  const totalCount = stats?.total_books ?? 0
+  const availableCount = stats?.available_anywhere ?? 0
+
   const handleBookUpdate = (updatedBook: BookWithAvailability) => {
     setBooks(prev =>
       prev.map(book =>
         book.id === updatedBook.id ? updatedBook : book
       )
     )
+    fetchStats().catch(err => console.error('Failed to refresh stats:', err))
   }
 
-  // Count available books
-  const availableCount = books.filter(book =>
-    book.availability?.some(a => a.status === 'available')
-  ).length
-
   return (
     <div className="min-h-screen bg-gray-50 dark:bg-gray-900">
       <Header />
 
       <main className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
         {/* Stats */}
-        {!isLoading && books.length > 0 && (
+        {!isLoading && totalCount > 0 && (
           <div className="mb-6 flex flex-wrap gap-4">
             <div className="bg-white dark:bg-gray-800 rounded-lg px-4 py-3 shadow-sm border border-gray-200 dark:border-gray-700">
               <span className="text-2xl font-bold text-gray-900 dark:text-white">
-                {books.length}
+                {totalCount}
               </span>
               <span className="text-gray-600 dark:text-gray-400 ml-2">
                 books on your list
@@ -66,6 +131,22 @@ export default function Dashboard() {
                 </span>
               </div>
             )}
+            {stats?.last_refreshed_at && (
+              <div className="px-4 py-3 text-sm text-gray-500 dark:text-gray-400 self-center">
+                Last checked {new Date(stats.last_refreshed_at + 'Z').toLocaleString()}
+                {stats.stale > 0 && ` · ${stats.stale} results out of date`}
+              </div>
+            )}
+            <button
+              onClick={checkAll}
+              disabled={job !== null}
+              className="ml-auto self-center flex items-center gap-2 px-4 py-2 rounded-lg bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-100 dark:hover:bg-gray-700 disabled:opacity-50"
+            >
+              <RefreshCw className={`h-4 w-4 ${job ? 'animate-spin' : ''}`} />
+              {job
+                ? `Checking ${job.done} of ${job.total}${job.eta_seconds != null ? ` · ~${Math.ceil(job.eta_seconds / 60)} min left` : ''}`
+                : 'Check all'}
+            </button>
           </div>
         )}
 
@@ -85,6 +166,18 @@ export default function Dashboard() {
           onBookUpdate={handleBookUpdate}
           isLoading={isLoading}
         />
+
+        {nextCursor && !isLoading && (
+          <div className="mt-8 flex justify-center">
+            <button
+              onClick={loadMore}
+              disabled={isLoadingMore}
+              className="px-4 py-2 rounded-lg bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-100 dark:hover:bg-gray-700 disabled:opacity-50"
+            >
+              {isLoadingMore ? 'Loading...' : `Load more (${books.length} of ${totalCount})`}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   )
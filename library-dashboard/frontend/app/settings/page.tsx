@@ -2,8 +2,8 @@
 
 import { useState, useEffect } from 'react'
 import Link from 'next/link'
-import { ArrowLeft, Plus, Trash2, Save, Loader2, CheckCircle, XCircle, Rss } from 'lucide-react'
-import { Library, getLibraries, addLibrary, deleteLibrary, syncGoodreads } from '@/lib/api'
+import { ArrowLeft, Plus, Trash2, Save, Loader2, CheckCircle, XCircle, Rss, Upload } from 'lucide-react'
+import { Library, getLibraries, addLibrary, deleteLibrary, syncGoodreads, importGoodreadsCsv } from '@/lib/api'
 
 export default function Settings() {
   const [libraries, setLibraries] = useState<Library[]>([])
@@ -47,9 +47,15 @@ export default function Settings() {
     setSyncResult(null)
 
     try {
-      const books = await syncGoodreads(goodreadsUrl)
+      const summary = await syncGoodreads(goodreadsUrl)
       localStorage.setItem('goodreads_rss_url', goodreadsUrl)
-      setSyncResult({ success: true, message: `Synced ${books.length} books from Goodreads!` })
+      setSyncResult({
+        success: true,
+        message: summary.not_modified
+          ? `Your ${summary.books_synced} books are already up to date.`
+          : `Synced ${summary.books_synced} books from Goodreads! ` +
+            `(${summary.added} added, ${summary.updated} updated, ${summary.removed} removed)`,
+      })
     } catch (error) {
       setSyncResult({ success: false, message: 'Failed to sync. Check your RSS URL.' })
     } finally {
@@ -57,6 +63,28 @@ export default function Settings() {
     }
   }
 
+  const handleImportCsv = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0]
+    e.target.value = ''
+    if (!file) return
+
+    setIsSyncing(true)
+    setSyncResult(null)
+
+    try {
+      const summary = await importGoodreadsCsv(file)
+      setSyncResult({
+        success: true,
+        message: `Imported ${summary.books_synced} books from your Goodreads export! ` +
+          `(${summary.added} added, ${summary.updated} updated, ${summary.removed} removed)`,
+      })
+    } catch (error) {
+      setSyncResult({ success: false, message: 'Failed to import. Make sure this is the CSV from Goodreads "Export Library".' })
+    } finally {
+      setIsSyncing(false)
+    }
+  }
+
   const handleAddLibrary = async (e: React.FormEvent) => {
     e.preventDefault()
     setIsAdding(true)
@@ -147,6 +175,23 @@ export default function Settings() {
               {isSyncing ? 'Syncing...' : 'Sync Books'}
             </button>
 
+            <p className="text-sm text-gray-600 dark:text-gray-400">
+              Large shelf? Upload the CSV from Goodreads → My Books → Import and export → Export Library instead.
+            </p>
+            <label className={`inline-flex items-center gap-2 px-4 py-2 border border-orange-500 text-orange-600 dark:text-orange-400 rounded-lg transition-colors ${
+              isSyncing ? 'opacity-50 cursor-not-allowed' : 'hover:bg-orange-50 dark:hover:bg-orange-900/20 cursor-pointer'
+            }`}>
+              <Upload className="h-4 w-4" />
+              Import CSV Export
+              <input
+                type="file"
+                accept=".csv,text/csv"
+                onChange={handleImportCsv}
+                disabled={isSyncing}
+                className="hidden"
+              />
+            </label>
+
             {syncResult && (
               <div className={`flex items-center gap-2 p-3 rounded-lg ${
                 syncResult.success
@@ -33,8 +33,17 @@ export interface BookWithAvailability extends Book {
   availability: Availability[]
 }
 
+export interface SyncSummary {
+  books_synced: number
+  added: number
+  updated: number
+  removed: number
+  unchanged: number
+  not_modified: boolean
+}
+
 // Goodreads endpoints
-export async function syncGoodreads(rssUrl: string): Promise<Book[]> {
+export async function syncGoodreads(rssUrl: string): Promise<SyncSummary> {
   const res = await fetch(`${API_BASE}/api/goodreads/sync`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -44,12 +53,84 @@ export async function syncGoodreads(rssUrl: string): Promise<Book[]> {
   return res.json()
 }
 
+export async function importGoodreadsCsv(file: File): Promise<SyncSummary> {
+  const body = new FormData()
+  body.append('file', file)
+  const res = await fetch(`${API_BASE}/api/goodreads/import-csv`, {
+    method: 'POST',
+    body,
+  })
+  if (!res.ok) throw new Error('Failed to import Goodreads export')
+  return res.json()
+}
+
 export async function getBooks(): Promise<BookWithAvailability[]> {
   const res = await fetch(`${API_BASE}/api/goodreads/books`)
   if (!res.ok) throw new Error('Failed to fetch books')
   return res.json()
 }
 
+export interface BookPage {
+  items: BookWithAvailability[]
+  next_cursor: string | null
+}
+
+export interface BookFilters {
+  status?: Availability['status']
+  library_id?: number
+  q?: string
+}
+
+function filterParams(filters: BookFilters): URLSearchParams {
+  const params = new URLSearchParams()
+  if (filters.status) params.set('status', filters.status)
+  if (filters.library_id) params.set('library_id', String(filters.library_id))
+  if (filters.q) params.set('q', filters.q)
+  return params
+}
+
+export async function getBooksPage(
+  cursor?: string | null,
+  limit = 50,
+  filters: BookFilters = {},
+): Promise<BookPage> {
+  const params = filterParams(filters)
+  params.set('limit', String(limit))
+  if (cursor) params.set('cursor', cursor)
+  const res = await fetch(`${API_BASE}/api/goodreads/books/page?${params}`)
+  if (!res.ok) throw new Error('Failed to fetch books')
+  return res.json()
+}
+
+export async function getBookCount(filters: BookFilters = {}): Promise<number> {
+  const res = await fetch(`${API_BASE}/api/goodreads/books/count?${filterParams(filters)}`)
+  if (!res.ok) throw new Error('Failed to count books')
+  const data: { count: number } = await res.json()
+  return data.count
+}
+
+export interface LibraryStats {
+  library_id: number
+  library_name: string
+  checked: number
+  by_status: Record<string, number>
+}
+
+export interface DashboardStats {
+  total_books: number
+  available_anywhere: number
+  stale: number
+  last_refreshed_at: string | null
+  by_status: Record<string, number>
+  by_library: LibraryStats[]
+}
+
+export async function getDashboardStats(): Promise<DashboardStats> {
+  const res = await fetch(`${API_BASE}/api/availability/stats`)
+  if (!res.ok) throw new Error('Failed to fetch stats')
+  return res.json()
+}
+
 // Library endpoints
 export async function getLibraries(): Promise<Library[]> {
   const res = await fetch(`${API_BASE}/api/libraries`)
@@ -104,9 +185,12 @@ export async function checkAllAvailability(): Promise<{ job_id: string }> {
 }
 
 export interface JobStatus {
-  status: 'running' | 'completed' | 'error'
+  status: 'queued' | 'running' | 'completed'
   progress: number
-  error?: string
+  total: number
+  done: number
+  failed: number
+  eta_seconds: number | null
 }
 
 export async function getJobStatus(jobId: string): Promise<JobStatus> {
@@ -115,6 +199,30 @@ export async function getJobStatus(jobId: string): Promise<JobStatus> {
   return res.json()
 }
 
+export interface JobStreamHandlers {
+  onResult: (result: Availability) => void
+  onProgress: (status: JobStatus) => void
+  onEnd: () => void
+}
+
+// Follow a job over server-sent events; returns a function that stops listening
+export function streamJob(jobId: string, handlers: JobStreamHandlers): () => void {
+  const source = new EventSource(`${API_BASE}/api/availability/job/${jobId}/stream`)
+  source.addEventListener('result', e => handlers.onResult(JSON.parse((e as MessageEvent).data)))
+  source.addEventListener('progress', e => handlers.onProgress(JSON.parse((e as MessageEvent).data)))
+  source.addEventListener('end', () => {
+    source.close()
+    handlers.onEnd()
+  })
+  // A dropped or refused stream ends the job's tracking rather than
+  // leaving it looking in progress
+  source.onerror = () => {
+    source.close()
+    handlers.onEnd()
+  }
+  return () => source.close()
+}
+
 // Checkout endpoints
 export async function borrowBook(bookId: number, libraryId: number): Promise<{ success: boolean; message: string }> {
   const res = await fetch(`${API_BASE}/api/checkout/borrow`, {